@@ -1,11 +1,76 @@
-from ctypes import py_object
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from functools import reduce as _reduce
+from heapq import merge
+from ctypes import (
+    c_byte, c_double, c_float, c_int, c_long, c_longlong, c_short, c_ubyte,
+    c_uint, c_ulong, c_ulonglong, c_ushort, py_object, sizeof,
+)
+
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, TypedArray falls back to python
+    np = None
+
+_MISSING = object()
+
+
+class GrowthPolicy(object):
+    """
+    Decides how the array capacity changes. growth_factor is applied when the
+    array is full, capacity is reduced once the fill ratio drops to
+    shrink_below (0 disables shrinking) and never goes under min_capacity.
+    """
+
+    def __init__(self, growth_factor=2, shrink_below=0.25, min_capacity=4):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1!!")
+        # After shrinking the array is 1/growth_factor full, so it must be
+        # above shrink_below otherwise push/pop near it would keep resizing
+        if not 0 <= shrink_below < 1 / growth_factor:
+            raise ValueError("shrink_below must be in [0, 1/growth_factor)!!")
+        if min_capacity < 1:
+            raise ValueError("min_capacity must be at least 1!!")
+        self.growth_factor = growth_factor
+        self.shrink_below = shrink_below
+        self.min_capacity = int(min_capacity)
+
+    def grow(self, capacity, needed):
+        """
+        Returns the capacity to use so needed elements fit
+        """
+        new_capacity = max(capacity, self.min_capacity)
+        while new_capacity < needed:
+            new_capacity = max(int(new_capacity * self.growth_factor),
+                               new_capacity + 1)
+        return new_capacity
+
+    def shrink(self, capacity, size):
+        """
+        Returns the capacity to use after removing elements
+        """
+        if (capacity <= self.min_capacity
+                or size > capacity * self.shrink_below):
+            return capacity
+        # Keep growth_factor times the size, so the array is back in the
+        # middle of the band and small push/pop bursts won't resize it
+        return max(self.min_capacity, int(size * self.growth_factor))
 
 
 class MyArray(object):
 
-    def __init__(self):
+    # Number of elements read at once by iteration and exporters
+    CHUNK_SIZE = 4096
+
+    def __init__(self, policy=None):
+        self.policy = policy if policy is not None else GrowthPolicy()
         self.SIZE = 0
-        self.CAPACITY = 4
+        self.CAPACITY = self.policy.min_capacity
+        # Capacity asked for by reserve, shrinking never goes under it
+        self._reserved = 0
         self.arr = self._create(self.CAPACITY)
 
     def size(self):
@@ -38,9 +103,9 @@ class MyArray(object):
         """
         Push element at end
         """
-        # Double the size if array is full
+        # Grow the array if it is full
         if self.SIZE == self.CAPACITY:
-            self._resize(2 * self.CAPACITY)
+            self._ensure_capacity(self.SIZE + 1)
         self.arr[self.SIZE] = element
         self.SIZE += 1
 
@@ -51,20 +116,13 @@ class MyArray(object):
         # Allowing till size so item can be inserted to end
         if not 0 <= index <= self.SIZE:
             raise IndexError("Index out of range!!")
-        # Double the size if array is full
+        # Grow the array if it is full
         if self.SIZE == self.CAPACITY:
-            self._resize(2 * self.CAPACITY)
-
-        # Catching index error if tried to insert element at end
-        try:
-            replaced_val = self.at(index)
-        except IndexError:
-            # If moving element to end then no need to move elements
-            replaced_val = None
-        self.arr[index] = item
+            self._ensure_capacity(self.SIZE + 1)
 
-        if replaced_val:
-            self._shift_elements_right(index + 1, replaced_val)
+        # Move trailing elements one step right to make room for the item
+        self._shift_elements_right(index)
+        self.arr[index] = item
         self.SIZE += 1
 
     def prepend(self, item):
@@ -72,36 +130,22 @@ class MyArray(object):
         Insert element at begining
         """
         if self.SIZE == self.CAPACITY:
-            self._resize(2 * self.CAPACITY)
-        if self.SIZE:
-            replaced_val = self.arr[0]
-            self.arr[0] = item
-        else:
-            # If array is empty then no need to move element
-            self.arr[0] = item
-            replaced_val = None
-
-        if replaced_val:
-            self._shift_elements_right(1, replaced_val)
+            self._ensure_capacity(self.SIZE + 1)
+        self._shift_elements_right(0)
+        self.arr[0] = item
         self.SIZE += 1
 
-    def _shift_elements_right(self, index, replaced_val):
+    def _shift_elements_right(self, index):
         """
         shifting all trailing elements right (on insertion opreation)
         """
-        for i in range(index, self.SIZE + 1):
-            # Make sure it's not accessing the last null element
-            if not i == self.SIZE:
-                new_replaced_val = self.arr[i]
-            self.arr[i] = replaced_val
-            replaced_val = new_replaced_val
+        self._move(index, index + 1, self.SIZE - index)
 
     def _shift_elements_left(self, index):
         """
         shifting all trailing elements (on deletion operation)
         """
-        for i in range(index, self.SIZE):
-            self.arr[i] = self.arr[i + 1]
+        self._move(index + 1, index, self.SIZE - index)
 
     def pop(self):
         """
@@ -112,75 +156,246 @@ class MyArray(object):
             raise IndexError("Index out of range!!")
 
         item = self.arr[self.SIZE - 1]
-        self.arr[self.SIZE - 1] = py_object()
+        self._clear(self.SIZE - 1, self.SIZE)
         self.SIZE -= 1
-        # Reduce array capacity by half is size is 1/4 of capacity
-        if self.SIZE == self.CAPACITY / 4:
-            self._resize(self.CAPACITY / 2)
+        self._shrink()
         return item
 
     def _delete(self, index):
-        self.arr[index] = py_object()
         self.SIZE -= 1
         self._shift_elements_left(index)
+        self._clear(self.SIZE, self.SIZE + 1)
 
     def delete(self, index):
         """
         delete item at index, shifting all trailing elements left
         """
 
-        # If there is element in array and index is within range
-        if self.SIZE and not 0 <= index < self.SIZE:
+        if not 0 <= index < self.SIZE:
             raise IndexError("Index out of range!!")
 
         self._delete(index)
-
-        # Reduce array capacity by half is size is 1/4 of capacity
-        if self.SIZE <= self.CAPACITY / 4:
-            self._resize(int(self.CAPACITY / 2))
+        self._shrink()
 
     def remove(self, item):
         """
         looks for value and removes index holding it
         (even if in multiple places)
         """
-        self._remove(0, item)
+        return self.remove_if(lambda value: value == item)
 
-        # Reduce array capacity by half is size is 1/4 of capacity
-        if self.SIZE <= self.CAPACITY / 4:
-            self._resize(int(self.CAPACITY / 2))
+    def remove_if(self, predicate):
+        """
+        removes every element for which predicate is true, returns the number
+        of removed elements
+        """
+        arr = self.arr
+        # Single pass: read walks every element, write only advances for the
+        # elements that are kept so they get compacted towards the start
+        write = 0
+        for read in range(self.SIZE):
+            value = arr[read]
+            if not predicate(value):
+                if write != read:
+                    arr[write] = value
+                write += 1
+        removed = self.SIZE - write
+        self._clear(write, self.SIZE)
+        self.SIZE = write
+        if removed:
+            self._shrink()
+        return removed
 
-    def _remove(self, index, value):
-        if index == self.SIZE:
-            return
-        if self.arr[index] == value:
-            self._delete(index)
-            # There can two adjencent values so after shifting elements to left
-            # duplicate will be on the same index that's why decreasing index
-            # so in the next statement after increasing it by 1 it will be same
-            index -= 1
-        index += 1
-        self._remove(index, value)
+    def retain(self, predicate):
+        """
+        keeps only the elements for which predicate is true, returns the
+        number of removed elements
+        """
+        return self.remove_if(lambda value: not predicate(value))
+
+    def extend(self, iterable):
+        """
+        Push all elements of iterable at end, resizing at most once
+        """
+        self._replace(self.SIZE, self.SIZE, iterable)
+
+    def insert_many(self, index, iterable):
+        """
+        Insert all elements of iterable starting from given index, trailing
+        elements are moved right in one block
+        """
+        # Allowing till size so items can be inserted to end
+        if not 0 <= index <= self.SIZE:
+            raise IndexError("Index out of range!!")
+        self._replace(index, index, iterable)
+
+    def delete_range(self, start, stop):
+        """
+        delete items from start till stop (excluding stop), trailing elements
+        are moved left in one block
+        """
+        if not 0 <= start <= stop <= self.SIZE:
+            raise IndexError("Index out of range!!")
+        self._replace(start, stop, ())
+
+    def _replace(self, start, stop, iterable):
+        """
+        Replace elements from start till stop with items of iterable, moving
+        the trailing elements only once whatever the number of items is
+        """
+        items = list(iterable)
+        diff = len(items) - (stop - start)
+        if diff > 0:
+            self._ensure_capacity(self.SIZE + diff)
+        self._move(stop, stop + diff, self.SIZE - stop)
+        if diff < 0:
+            # Release the references left behind at the end
+            self._clear(self.SIZE + diff, self.SIZE)
+        self.arr[start:start + len(items)] = items
+        self.SIZE += diff
+        if diff < 0:
+            self._shrink()
+
+    def _move(self, src, dst, count):
+        """
+        Move count elements from src to dst in a single block copy
+        """
+        if count > 0:
+            self.arr[dst:dst + count] = self.arr[src:src + count]
+
+    def _clear(self, start, stop):
+        """
+        Empty the slots from start till stop
+        """
+        if stop > start:
+            self.arr[start:stop] = [py_object()] * (stop - start)
+
+    def _ensure_capacity(self, min_capacity):
+        """
+        Grow the array as per policy till min_capacity elements fit, with one
+        resize
+        """
+        if min_capacity > self.CAPACITY:
+            self._resize(self.policy.grow(self.CAPACITY, min_capacity))
+
+    def _shrink(self):
+        """
+        Reduce the capacity as per policy after elements are removed, not
+        under the reserved capacity
+        """
+        new_capacity = max(self.policy.shrink(self.CAPACITY, self.SIZE),
+                           min(self._reserved, self.CAPACITY))
+        if new_capacity != self.CAPACITY:
+            self._resize(new_capacity)
+
+    def reserve(self, capacity):
+        """
+        Make room for at least capacity elements, so that many pushes/inserts
+        won't resize the array. Removing elements won't shrink it under that
+        till shrink_to_fit is called.
+        """
+        self._reserved = max(self._reserved, capacity)
+        if capacity > self.CAPACITY:
+            self._resize(capacity)
+
+    def shrink_to_fit(self):
+        """
+        Reduce the capacity to the size (or policy's min_capacity), dropping
+        the reserved capacity
+        """
+        self._reserved = 0
+        new_capacity = max(self.SIZE, self.policy.min_capacity)
+        if new_capacity != self.CAPACITY:
+            self._resize(new_capacity)
 
     def find(self, value):
         """
         looks for value and returns first index with that value, -1 if not
         found
         """
-        index = -1
-        for i in range(self.SIZE):
-            if self.arr[i] == value:
-                index = i
-                break
-        return index
+        offset = 0
+        # list.index compares a whole chunk in C
+        for chunk in self.iter_chunks():
+            try:
+                return offset + chunk.index(value)
+            except ValueError:
+                offset += len(chunk)
+        return -1
+
+    def find_all(self, value):
+        """
+        looks for value and returns all the indexes holding it
+        """
+        return [i for i, item in enumerate(self) if item == value]
+
+    def count(self, value):
+        """
+        Number of elements equal to value
+        """
+        return sum(chunk.count(value) for chunk in self.iter_chunks())
+
+    def map(self, func):
+        """
+        New array holding func(element) for every element
+        """
+        result = MyArray(self.policy)
+        result.reserve(self.SIZE)
+        for chunk in self.iter_chunks():
+            result.extend(map(func, chunk))
+        return result
+
+    def filter(self, predicate):
+        """
+        New array holding the elements for which predicate is true
+        """
+        result = self._empty_copy()
+        for chunk in self.iter_chunks():
+            result.extend(item for item in chunk if predicate(item))
+        return result
+
+    def reduce(self, func, initial=_MISSING):
+        """
+        Reduce the elements to one value with func, like functools.reduce
+        """
+        if initial is _MISSING:
+            return _reduce(func, self)
+        return _reduce(func, self, initial)
+
+    def sum(self, start=0):
+        """
+        Sum of all elements
+        """
+        return sum((sum(chunk) for chunk in self.iter_chunks()), start)
+
+    def argmax(self):
+        """
+        Index of the (first) largest element
+        """
+        return self._arg_best(lambda item, best: item > best)
+
+    def argmin(self):
+        """
+        Index of the (first) smallest element
+        """
+        return self._arg_best(lambda item, best: item < best)
+
+    def _arg_best(self, better):
+        if not self.SIZE:
+            raise ValueError("Cannot find arg of an empty array!!")
+        best_index, best = 0, self.at(0)
+        for i, item in enumerate(self):
+            if better(item, best):
+                best_index, best = i, item
+        return best_index
 
     def _resize(self, new_capacity):
         """
         Resize the array capacity
         """
         new_arr = self._create(new_capacity)
-        for i in range(self.SIZE):
-            new_arr[i] = self.arr[i]  # Copy all items to new array
+        if self.SIZE:
+            # Copy all items to new array in one block
+            new_arr[:self.SIZE] = self.arr[:self.SIZE]
 
         self.arr = new_arr  # replace with new array
         self.CAPACITY = new_capacity  # Reset capacity
@@ -188,26 +403,905 @@ class MyArray(object):
     def _create(self, capacity):
         return (capacity * py_object)()
 
+    def _empty_copy(self):
+        """
+        New empty array of the same kind, used for slicing
+        """
+        return MyArray(self.policy)
+
     def __len__(self):
         return self.size()
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.SIZE)
+            result = self._empty_copy()
+            if step == 1:
+                result.extend(self.arr[start:stop] if start < stop else ())
+            else:
+                result.extend(self.arr[i] for i in range(start, stop, step))
+            return result
         return self.at(index)
 
     def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.SIZE)
+            if step == 1:
+                self._replace(start, max(start, stop), value)
+                return
+            positions = range(start, stop, step)
+            items = list(value)
+            if len(items) != len(positions):
+                raise ValueError(
+                    F"Cannot assign {len(items)} items to extended slice of "
+                    F"size {len(positions)}!!")
+            for i, item in zip(positions, items):
+                self.arr[i] = item
+            return
         # Allowing till size so item can be inserted to end
         if not 0 <= index <= self.SIZE:
             raise IndexError("Index assignment out of range!!")
         self.arr[index] = value
         self.SIZE += 1
 
+    def __delitem__(self, index):
+        if not isinstance(index, slice):
+            self.delete(index)
+            return
+        start, stop, step = index.indices(self.SIZE)
+        if step == 1:
+            self._replace(start, max(start, stop), ())
+            return
+        positions = range(start, stop, step)
+        if not positions:
+            return
+        first = min(positions[0], positions[-1])
+        # Keep everything after the first deleted element which is not in the
+        # slice and write it back in one block
+        kept = [self.arr[i] for i in range(first, self.SIZE)
+                if i not in positions]
+        self.arr[first:first + len(kept)] = kept
+        self._clear(first + len(kept), self.SIZE)
+        self.SIZE = first + len(kept)
+        self._shrink()
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def _slice(self, start, stop):
+        """
+        List of elements from start till stop, copied in one block
+        """
+        return self.arr[start:stop]
+
+    def _chunk_size(self, size):
+        """
+        Number of elements per chunk for iter_chunks/iter_bytes
+        """
+        if size is None:
+            return self.CHUNK_SIZE
+        if size < 1:
+            raise ValueError("Chunk size must be at least 1!!")
+        return size
+
+    def iter_chunks(self, size=None):
+        """
+        Yields the elements as lists of (at most) size contiguous elements
+        """
+        # Checked here, not in the generator, so a bad size fails right away
+        return self._iter_chunks(self._chunk_size(size))
+
+    def _iter_chunks(self, size):
+        start = 0
+        while start < self.SIZE:
+            stop = min(start + size, self.SIZE)
+            yield self._slice(start, stop)
+            start = stop
+
+    def iter_bytes(self, size=None):
+        """
+        Yields the encoded elements chunk by chunk, as one line of text per
+        element
+        """
+        return ("".join(str(item) + "\n" for item in chunk).encode()
+                for chunk in self.iter_chunks(size))
+
+    def to_bytes(self):
+        """
+        Encoded elements (see iter_bytes) as one bytes object
+        """
+        return b"".join(self.iter_bytes())
+
+    def write_to(self, file, size=None):
+        """
+        Writes the encoded elements (see iter_bytes) to a binary file object
+        chunk by chunk, returns number of bytes written
+        """
+        written = 0
+        for data in self.iter_bytes(size):
+            file.write(data)
+            written += len(data)
+        return written
+
     def __repr__(self):
-        start = "["
-        end = "]"
-        elements = ""
-        for i in range(self.SIZE):
-            elements = elements + str(self.arr[i])
-            if not i == self.SIZE - 1:
-                elements += ", "
-        elements = elements.rstrip()
-        return start + elements + end
+        return "[" + ", ".join(str(item) for item in self) + "]"
+
+
+class SortedArray(MyArray):
+    """
+    MyArray which keeps its elements in ascending order, lookups are binary
+    searches (O(log n)) instead of linear scans. Elements are added with
+    push/add/extend, positional inserts are not allowed as they would break
+    the order.
+    """
+
+    def add(self, item):
+        """
+        Insert element at its sorted position (after the equal ones)
+        """
+        index = bisect_right(self.arr, item, 0, self.SIZE)
+        super().insert(index, item)
+
+    def push(self, item):
+        self.add(item)
+
+    def extend(self, iterable):
+        """
+        Add all elements of iterable, merging them in one pass with a single
+        resize
+        """
+        items = sorted(iterable)
+        if not items:
+            return
+        if self.SIZE and items[0] >= self.arr[self.SIZE - 1]:
+            # Everything goes after the current elements
+            super().extend(items)
+            return
+        self._replace(0, self.SIZE, merge(self.arr[:self.SIZE], items))
+
+    def insert(self, index, item):
+        raise TypeError("SortedArray keeps its own order, use add()!!")
+
+    def prepend(self, item):
+        raise TypeError("SortedArray keeps its own order, use add()!!")
+
+    def insert_many(self, index, iterable):
+        raise TypeError("SortedArray keeps its own order, use extend()!!")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and index.indices(self.SIZE)[2] < 0:
+            # Going backwards the elements aren't sorted, so a plain array
+            result = MyArray(self.policy)
+            result.extend(self.arr[i]
+                          for i in range(*index.indices(self.SIZE)))
+            return result
+        return super().__getitem__(index)
+
+    def __setitem__(self, index, value):
+        raise TypeError("SortedArray keeps its own order, use add()!!")
+
+    def lower_bound(self, value):
+        """
+        First index whose element is not less than value
+        """
+        return bisect_left(self.arr, value, 0, self.SIZE)
+
+    def upper_bound(self, value):
+        """
+        First index whose element is greater than value
+        """
+        return bisect_right(self.arr, value, 0, self.SIZE)
+
+    def find(self, value):
+        """
+        looks for value and returns first index with that value, -1 if not
+        found
+        """
+        index = self.lower_bound(value)
+        if index < self.SIZE and self.arr[index] == value:
+            return index
+        return -1
+
+    def find_all(self, value):
+        """
+        looks for value and returns all the indexes holding it
+        """
+        return list(range(self.lower_bound(value), self.upper_bound(value)))
+
+    def count(self, value):
+        """
+        Number of elements equal to value
+        """
+        return self.upper_bound(value) - self.lower_bound(value)
+
+    def range_query(self, low, high):
+        """
+        Returns the elements which are >= low and < high
+        """
+        return self[self.lower_bound(low):self.lower_bound(high)]
+
+    def remove(self, item):
+        """
+        looks for value and removes all the indexes holding it, returns the
+        number of removed elements
+        """
+        start, stop = self.lower_bound(item), self.upper_bound(item)
+        self._replace(start, stop, ())
+        return stop - start
+
+    def _empty_copy(self):
+        return SortedArray(self.policy)
+
+
+class IndexedArray(MyArray):
+    """
+    MyArray with a hash index from value to its positions, so find/find_all
+    don't scan the array. Elements must be hashable. push/pop/extend keep the
+    index up to date, other updates move positions around so they drop the
+    index. Lookups then scan like MyArray, and the index is rebuilt only once
+    REBUILD_AFTER of them came with no update in between.
+    """
+
+    # Rebuilding costs about as much as 16 find or 3 find_all scans
+    REBUILD_AFTER = 8
+
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        self._index = {}
+        # Lookups since the index was dropped
+        self._scans = 0
+
+    def _use_index(self):
+        """
+        Tells if lookups should go through the index, rebuilding it if it's
+        worth it
+        """
+        if self._index is not None:
+            return True
+        self._scans += 1
+        return self._scans > self.REBUILD_AFTER
+
+    def _positions(self):
+        if self._index is None:
+            index = {}
+            for i in range(self.SIZE):
+                index.setdefault(self.arr[i], []).append(i)
+            self._index = index
+        return self._index
+
+    def _invalidate(self):
+        self._index = None
+        self._scans = 0
+
+    def push(self, element):
+        super().push(element)
+        if self._index is not None:
+            self._index.setdefault(element, []).append(self.SIZE - 1)
+
+    def pop(self):
+        item = super().pop()
+        if self._index is not None:
+            positions = self._index[item]
+            positions.pop()
+            if not positions:
+                del self._index[item]
+        return item
+
+    def _replace(self, start, stop, iterable):
+        old_size = self.SIZE
+        super()._replace(start, stop, iterable)
+        if self._index is None:
+            return
+        if start == stop == old_size:
+            # Appended at the end, existing positions are still valid
+            for i in range(old_size, self.SIZE):
+                self._index.setdefault(self.arr[i], []).append(i)
+        else:
+            self._invalidate()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._invalidate()
+
+    def prepend(self, item):
+        super().prepend(item)
+        self._invalidate()
+
+    def delete(self, index):
+        super().delete(index)
+        self._invalidate()
+
+    def remove_if(self, predicate):
+        removed = super().remove_if(predicate)
+        if removed:
+            self._invalidate()
+        return removed
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._invalidate()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._invalidate()
+
+    def find(self, value):
+        """
+        looks for value and returns first index with that value, -1 if not
+        found
+        """
+        if not self._use_index():
+            return super().find(value)
+        positions = self._positions().get(value)
+        return positions[0] if positions else -1
+
+    def find_all(self, value):
+        """
+        looks for value and returns all the indexes holding it
+        """
+        if not self._use_index():
+            return super().find_all(value)
+        return list(self._positions().get(value, ()))
+
+    def _empty_copy(self):
+        return IndexedArray(self.policy)
+
+
+class GapArray(MyArray):
+    """
+    MyArray backed by a gap buffer: the free capacity is kept as a gap at the
+    last edit point instead of at the end. Inserts/deletes near the previous
+    one only touch the gap (O(1) amortized), the elements are moved only when
+    the edit point jumps, and only the ones between the old and new point.
+    Bulk operations move the gap to the end and work like MyArray.
+    """
+
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        self._gap_start = 0
+        self._gap_end = self.CAPACITY
+
+    def _physical(self, index):
+        """
+        Buffer index of the element at index
+        """
+        if index < self._gap_start:
+            return index
+        return index + self._gap_end - self._gap_start
+
+    def _move_gap(self, index):
+        """
+        Move the gap so it starts at index
+        """
+        gap_start, gap_end = self._gap_start, self._gap_end
+        if index < gap_start:
+            # Elements between index and the gap go to the gap's end
+            count = gap_start - index
+            self._move(index, gap_end - count, count)
+            self._clear(index, min(gap_start, gap_end - count))
+            self._gap_start, self._gap_end = index, gap_end - count
+        elif index > gap_start:
+            # Elements after the gap go to its start
+            count = index - gap_start
+            self._move(gap_end, gap_start, count)
+            self._clear(max(index, gap_end), gap_end + count)
+            self._gap_start, self._gap_end = index, gap_end + count
+
+    def _close_gap(self):
+        """
+        Move the gap to the end so the layout is the same as MyArray's
+        """
+        self._move_gap(self.SIZE)
+
+    def _sync_gap(self):
+        # After a MyArray operation the gap is whatever follows the elements
+        self._gap_start, self._gap_end = self.SIZE, self.CAPACITY
+
+    def at(self, index):
+        """
+        Get element form index
+        """
+        if not 0 <= index < self.SIZE:
+            raise IndexError("Index out of range!!")
+        return self.arr[self._physical(index)]
+
+    def insert(self, index, item):
+        """
+        Insert element at given index
+        """
+        # Allowing till size so item can be inserted to end
+        if not 0 <= index <= self.SIZE:
+            raise IndexError("Index out of range!!")
+        if self.SIZE == self.CAPACITY:
+            self._ensure_capacity(self.SIZE + 1)
+        self._move_gap(index)
+        self.arr[self._gap_start] = item
+        self._gap_start += 1
+        self.SIZE += 1
+
+    def push(self, element):
+        self.insert(self.SIZE, element)
+
+    def prepend(self, item):
+        self.insert(0, item)
+
+    def delete(self, index):
+        """
+        delete item at index
+        """
+        if not 0 <= index < self.SIZE:
+            raise IndexError("Index out of range!!")
+        self._move_gap(index)
+        item = self.arr[self._gap_end]
+        self._clear(self._gap_end, self._gap_end + 1)
+        self._gap_end += 1
+        self.SIZE -= 1
+        self._shrink()
+        return item
+
+    def pop(self):
+        """
+        remove from end, return value
+        """
+        if not self.SIZE:
+            raise IndexError("Index out of range!!")
+        return self.delete(self.SIZE - 1)
+
+    def _resize(self, new_capacity):
+        """
+        Resize the array capacity, the gap stays where it is
+        """
+        new_arr = self._create(new_capacity)
+        back = self.CAPACITY - self._gap_end
+        # Not using _gap_start, MyArray operations run with the gap closed
+        # and update SIZE before shrinking
+        front = self.SIZE - back
+        if front:
+            new_arr[:front] = self.arr[:front]
+        if back:
+            new_arr[new_capacity - back:] = self.arr[self._gap_end:]
+        self.arr = new_arr
+        self.CAPACITY = new_capacity
+        self._gap_start, self._gap_end = front, new_capacity - back
+
+    def _slice(self, start, stop):
+        gap_start, gap_end = self._gap_start, self._gap_end
+        if stop <= gap_start:
+            return self.arr[start:stop]
+        shift = gap_end - gap_start
+        if start >= gap_start:
+            return self.arr[start + shift:stop + shift]
+        return self.arr[start:gap_start] + self.arr[gap_end:stop + shift]
+
+    def remove_if(self, predicate):
+        self._close_gap()
+        removed = super().remove_if(predicate)
+        self._sync_gap()
+        return removed
+
+    def _replace(self, start, stop, iterable):
+        self._close_gap()
+        super()._replace(start, stop, iterable)
+        self._sync_gap()
+
+    def _empty_copy(self):
+        return GapArray(self.policy)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self.at(index)
+        # Read around the gap, a slice shouldn't move it
+        start, stop, step = index.indices(self.SIZE)
+        result = self._empty_copy()
+        if step == 1:
+            result.extend(self._slice(start, stop) if start < stop else ())
+        else:
+            result.extend(self.arr[self._physical(i)]
+                          for i in range(start, stop, step))
+        return result
+
+    def __setitem__(self, index, value):
+        self._close_gap()
+        super().__setitem__(index, value)
+        self._sync_gap()
+
+    def __delitem__(self, index):
+        if not isinstance(index, slice):
+            self.delete(index)
+            return
+        self._close_gap()
+        super().__delitem__(index)
+        self._sync_gap()
+
+
+class TypedArray(MyArray):
+    """
+    Compact array of raw machine values (like the stdlib array module), the
+    typecode decides the element type. Elements are stored in a contiguous
+    ctypes buffer which is exported through the buffer protocol.
+    """
+
+    TYPECODES = {
+        "b": c_byte, "B": c_ubyte, "h": c_short, "H": c_ushort,
+        "i": c_int, "I": c_uint, "l": c_long, "L": c_ulong,
+        "q": c_longlong, "Q": c_ulonglong, "f": c_float, "d": c_double,
+    }
+
+    # Below this size numpy call overhead is more than the python loop, see
+    # benchmarks.py numpy_crossover
+    NUMPY_THRESHOLD = 1024
+    # Number of elements handed to numpy at once
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, typecode="d", policy=None):
+        if typecode not in self.TYPECODES:
+            raise ValueError(F"Invalid typecode: {typecode}!!")
+        self.typecode = typecode
+        self.ctype = self.TYPECODES[typecode]
+        self._limits = self._typecode_limits(typecode)
+        super().__init__(policy)
+
+    @classmethod
+    def _typecode_limits(cls, typecode):
+        """
+        (min, max) value of an integer typecode, None for floats
+        """
+        if typecode in "fd":
+            return None
+        bits = 8 * sizeof(cls.TYPECODES[typecode])
+        if typecode.islower():
+            return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+        return 0, (1 << bits) - 1
+
+    def _check(self, *values):
+        """
+        Raises OverflowError if a value doesn't fit the typecode, ctypes
+        would silently wrap it (300 stored as 44 in "b")
+        """
+        if self._limits is None or not values:
+            return
+        low, high = self._limits
+        if min(values) < low or max(values) > high:
+            bad = next(value for value in values
+                       if not low <= value <= high)
+            raise OverflowError(
+                F"{bad} is out of range for typecode {self.typecode}!!")
+
+    def push(self, element):
+        self._check(element)
+        super().push(element)
+
+    def insert(self, index, item):
+        self._check(item)
+        super().insert(index, item)
+
+    def prepend(self, item):
+        self._check(item)
+        super().prepend(item)
+
+    def _replace(self, start, stop, iterable):
+        items = list(iterable)
+        self._check(*items)
+        super()._replace(start, stop, items)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self._check(*value)
+        else:
+            self._check(value)
+        super().__setitem__(index, value)
+
+    def itemsize(self):
+        """
+        Size in bytes of one element
+        """
+        return sizeof(self.ctype)
+
+    def memoryview(self):
+        """
+        Zero copy view over the used part of the buffer, can be passed to
+        struct.unpack_from, numpy.frombuffer etc. Resizing the array replaces
+        the buffer, so a view must not be kept across pushes/inserts.
+        """
+        # ctypes exports explicit-endian formats ("<d"), cast to the native
+        # typecode so tolist/struct/numpy understand the view
+        view = memoryview(self.arr).cast("B").cast(self.typecode)
+        return view[:self.SIZE]
+
+    def iter_bytes(self, size=None):
+        """
+        Yields the raw machine values chunk by chunk, without copying
+        """
+        return self._iter_bytes(self._chunk_size(size) * self.itemsize())
+
+    def _iter_bytes(self, size):
+        view = self.memoryview().cast("B")
+        for start in range(0, len(view), size):
+            yield view[start:start + size]
+
+    def to_bytes(self):
+        """
+        Raw machine values as one bytes object
+        """
+        return self.memoryview().tobytes()
+
+    def _use_numpy(self):
+        return np is not None and self.SIZE >= self.NUMPY_THRESHOLD
+
+    @staticmethod
+    def _require_numpy():
+        if np is None:
+            raise ImportError("numpy is needed for vectorized operations!!")
+
+    def _batches(self):
+        """
+        Yields (offset, ndarray) batches viewing the buffer, without copying
+        """
+        if not self.SIZE:
+            return
+        data = np.frombuffer(self.memoryview(), dtype=self.typecode)
+        for start in range(0, len(data), self.BATCH_SIZE):
+            yield start, data[start:start + self.BATCH_SIZE]
+
+    def _extend_ndarray(self, values):
+        """
+        Push a numpy array of values at end, writing the buffer directly
+        """
+        count = len(values)
+        if count and self._limits is not None:
+            self._check(values.min().item(), values.max().item())
+        self._ensure_capacity(self.SIZE + count)
+        view = memoryview(self.arr).cast("B").cast(self.typecode)
+        np.frombuffer(view, dtype=self.typecode)[
+            self.SIZE:self.SIZE + count] = values
+        self.SIZE += count
+
+    def _equal(self, batch, value):
+        """
+        batch == value compared like the python loop does: python reads
+        float elements as doubles, while numpy would compare them with value
+        rounded to float
+        """
+        if self.typecode == "f":
+            batch = batch.astype(np.float64)
+        return batch == value
+
+    def find(self, value):
+        if not self._use_numpy():
+            return super().find(value)
+        for start, batch in self._batches():
+            found = np.flatnonzero(self._equal(batch, value))
+            if len(found):
+                return start + int(found[0])
+        return -1
+
+    def find_all(self, value):
+        if not self._use_numpy():
+            return super().find_all(value)
+        return [start + int(i) for start, batch in self._batches()
+                for i in np.flatnonzero(self._equal(batch, value))]
+
+    def count(self, value):
+        if not self._use_numpy():
+            return super().count(value)
+        return sum(int(np.count_nonzero(self._equal(batch, value)))
+                   for _, batch in self._batches())
+
+    def map(self, func, typecode=None, vectorized=False):
+        """
+        New TypedArray (of typecode, same as this one by default) holding
+        func(element) for every element. With vectorized=True func receives
+        numpy arrays of elements and must return arrays.
+        """
+        result = TypedArray(typecode or self.typecode, self.policy)
+        result.reserve(self.SIZE)
+        if not vectorized:
+            for chunk in self.iter_chunks():
+                result.extend(map(func, chunk))
+            return result
+        self._require_numpy()
+        for _, batch in self._batches():
+            result._extend_ndarray(np.asarray(func(batch)))
+        return result
+
+    def filter(self, predicate, vectorized=False):
+        """
+        New TypedArray holding the elements for which predicate is true. With
+        vectorized=True predicate receives numpy arrays of elements and must
+        return boolean masks.
+        """
+        if not vectorized:
+            return super().filter(predicate)
+        self._require_numpy()
+        result = self._empty_copy()
+        for _, batch in self._batches():
+            result._extend_ndarray(batch[np.asarray(predicate(batch))])
+        return result
+
+    def reduce(self, func, initial=_MISSING):
+        """
+        Reduce the elements to one value with func, numpy ufuncs (np.add,
+        np.maximum...) are applied batch by batch
+        """
+        if not (self._use_numpy() and isinstance(func, np.ufunc)):
+            return super().reduce(func, initial)
+        partial = [func.reduce(batch) for _, batch in self._batches()]
+        if initial is not _MISSING:
+            partial.insert(0, initial)
+        return func.reduce(np.asarray(partial)).item()
+
+    def sum(self, start=0):
+        if not self._use_numpy():
+            return super().sum(start)
+        return start + sum(batch.sum().item() for _, batch in self._batches())
+
+    def argmax(self):
+        if not self._use_numpy():
+            return super().argmax()
+        return self._np_arg_best(np.argmax, lambda item, best: item > best)
+
+    def argmin(self):
+        if not self._use_numpy():
+            return super().argmin()
+        return self._np_arg_best(np.argmin, lambda item, best: item < best)
+
+    def _np_arg_best(self, arg, better):
+        best_index, best = -1, None
+        for start, batch in self._batches():
+            i = int(arg(batch))
+            if best is None or better(batch[i], best):
+                best_index, best = start + i, batch[i]
+        return best_index
+
+    def __buffer__(self, flags):
+        # Buffer protocol hook (PEP 688, python 3.12+)
+        return self.memoryview()
+
+    def _create(self, capacity):
+        return (capacity * self.ctype)()
+
+    def _clear(self, start, stop):
+        # Raw values hold no references so there is nothing to release
+        pass
+
+    def _empty_copy(self):
+        return TypedArray(self.typecode, self.policy)
+
+    def __repr__(self):
+        return "%s(%r, %s)" % (self.__class__.__name__, self.typecode,
+                               super().__repr__())
+
+
+class MappedArray(TypedArray):
+    """
+    TypedArray stored in a file through mmap, so it outlives the process and
+    can be opened again without rebuilding it. Only the pages which are
+    touched get loaded, and several processes can open the same file with
+    readonly=True. The file holds a small header (magic, typecode, SIZE and
+    CAPACITY) followed by the raw elements, and grows with the array. For an
+    existing file the typecode is read from its header.
+    """
+
+    HEADER = struct.Struct("<4sc3xQQ")
+    MAGIC = b"MYAR"
+
+    def __init__(self, path, typecode="d", readonly=False, policy=None):
+        self.policy = policy if policy is not None else GrowthPolicy()
+        self.path = path
+        self.readonly = readonly
+        self._reserved = 0
+        self.arr = None
+        self._mmap = None
+        exists = os.path.exists(path) and os.path.getsize(path)
+        if readonly and not exists:
+            raise ValueError(F"Cannot open {path} as read-only, it is empty!!")
+        mode = "rb" if readonly else ("r+b" if exists else "w+b")
+        self._file = open(path, mode)
+        if exists:
+            header = self._file.read(self.HEADER.size)
+            magic, code, size, capacity = self.HEADER.unpack(header)
+            if magic != self.MAGIC:
+                self._file.close()
+                raise ValueError(F"{path} is not a MappedArray file!!")
+            typecode = code.decode()
+        else:
+            size, capacity = 0, self.policy.min_capacity
+        if typecode not in self.TYPECODES:
+            self._file.close()
+            raise ValueError(F"Invalid typecode: {typecode}!!")
+        self.typecode = typecode
+        self.ctype = self.TYPECODES[typecode]
+        self._limits = self._typecode_limits(typecode)
+        self._size = size
+        self._map(capacity)
+
+    @property
+    def SIZE(self):
+        return self._size
+
+    @SIZE.setter
+    def SIZE(self, size):
+        self._check_writable()
+        self._size = size
+        self._write_header()
+
+    @property
+    def CAPACITY(self):
+        return self._capacity
+
+    def _check_writable(self):
+        if self.readonly:
+            raise TypeError(F"{self.path} is opened read-only!!")
+
+    def _write_header(self):
+        self.HEADER.pack_into(self._mmap, 0, self.MAGIC,
+                              self.typecode.encode(), self._size,
+                              self._capacity)
+
+    def _map(self, capacity):
+        """
+        (Re)map the file so it can hold capacity elements
+        """
+        self._unmap()
+        length = self.HEADER.size + capacity * self.itemsize()
+        fileno = self._file.fileno()
+        if self.readonly:
+            self._mmap = mmap.mmap(fileno, length, access=mmap.ACCESS_READ)
+            # ctypes can't wrap read-only memory, a typed memoryview reads
+            # the same way and refuses writes
+            view = memoryview(self._mmap)[self.HEADER.size:length]
+            self.arr = view.cast(self.typecode)
+            self._capacity = capacity
+        else:
+            self._file.truncate(length)
+            self._mmap = mmap.mmap(fileno, length)
+            self.arr = (capacity * self.ctype).from_buffer(self._mmap,
+                                                          self.HEADER.size)
+            self._capacity = capacity
+            self._write_header()
+
+    def _unmap(self):
+        # The mapping can only be closed once nothing points into it
+        if isinstance(self.arr, memoryview):
+            self.arr.release()
+        self.arr = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _slice(self, start, stop):
+        chunk = self.arr[start:stop]
+        # Read-only files are mapped through a memoryview
+        return chunk.tolist() if self.readonly else chunk
+
+    def _resize(self, new_capacity):
+        """
+        Resize the file, elements are already in place so nothing is copied
+        """
+        self._check_writable()
+        self._map(new_capacity)
+
+    def flush(self):
+        """
+        Write the changes to disk
+        """
+        if not self.readonly:
+            self._mmap.flush()
+
+    def close(self):
+        """
+        Flush and close the file, views returned by memoryview() must be
+        released before
+        """
+        if self._mmap is not None:
+            self.flush()
+            self._unmap()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
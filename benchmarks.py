@@ -0,0 +1,179 @@
+"""
+Benchmarks for the data structures, run one with:
+
+    python benchmarks.py <name>
+
+and without a name to list them.
+"""
+import sys
+import time
+from timeit import timeit
+
+
+def _best_of(func, repeat=5, number=1):
+    """ Best time (in seconds) of one call to func. """
+    return min(timeit(func, number=number) for _ in range(repeat)) / number
+
+
+def numpy_crossover():
+    """
+    TypedArray operations with and without numpy, to find the size above
+    which the numpy layer is faster (TypedArray.NUMPY_THRESHOLD).
+    """
+    from array import TypedArray, np
+    if np is None:
+        print("numpy is not installed, nothing to compare")
+        return
+
+    operations = {
+        "sum": lambda arr: arr.sum(),
+        "argmax": lambda arr: arr.argmax(),
+        "count": lambda arr: arr.count(7),
+        "find": lambda arr: arr.find(-1),
+    }
+    threshold = TypedArray.NUMPY_THRESHOLD
+    print("%-8s %10s %12s %12s" % ("op", "size", "python (us)", "numpy (us)"))
+    try:
+        for name, operation in operations.items():
+            crossover = None
+            for power in range(4, 21, 2):
+                size = 1 << power
+                arr = TypedArray("d")
+                arr.extend(float(i % 100) for i in range(size))
+                TypedArray.NUMPY_THRESHOLD = float("inf")
+                python_time = _best_of(lambda: operation(arr))
+                TypedArray.NUMPY_THRESHOLD = 0
+                numpy_time = _best_of(lambda: operation(arr))
+                if crossover is None and numpy_time < python_time:
+                    crossover = size
+                print("%-8s %10d %12.1f %12.1f" % (
+                    name, size, python_time * 1e6, numpy_time * 1e6))
+            print("%s: numpy is faster from %s elements\n" % (name, crossover))
+    finally:
+        TypedArray.NUMPY_THRESHOLD = threshold
+
+
+def heap_arity(size=200000):
+    """
+    DaryHeap with different arities (and BinaryMaxHeap) on an insert-heavy
+    mix (every insert followed by an extract 1 time in 10) and an
+    extract-heavy one (heapify then extract everything).
+    """
+    import random
+    from binary_heap import BinaryMaxHeap, DaryHeap
+
+    items = [random.random() for _ in range(size)]
+    heaps = [("binary", BinaryMaxHeap)] + [
+        ("d=%d" % d, lambda arr=None, d=d: DaryHeap(arr, d=d))
+        for d in (2, 3, 4, 6, 8, 16)]
+
+    def insert_heavy(make):
+        heap = make()
+        for i, item in enumerate(items):
+            heap.insert(item)
+            if i % 10 == 9:
+                heap.extract_max()
+
+    def extract_heavy(make):
+        heap = make(list(items))
+        for _ in range(size):
+            heap.extract_max()
+
+    print("%-8s %12s %12s" % ("heap", "insert (s)", "extract (s)"))
+    best = {}
+    for name, make in heaps:
+        times = (_best_of(lambda: insert_heavy(make), repeat=3),
+                 _best_of(lambda: extract_heavy(make), repeat=3))
+        for mix, elapsed in zip(("insert", "extract"), times):
+            if mix not in best or elapsed < best[mix][1]:
+                best[mix] = (name, elapsed)
+        print("%-8s %12.3f %12.3f" % ((name,) + times))
+    for mix, (name, _) in best.items():
+        print("best for %s-heavy: %s" % (mix, name))
+
+
+def bucket_queue(operations=1000000, max_priority=1000):
+    """
+    BucketQueue against BinaryMaxHeap on 1M operations with small integer
+    priorities: half inserts then half extracts, and a monotone mix where
+    every extract is followed by an insert at or below the extracted
+    priority (like hop counts in a search).
+    """
+    import random
+    from binary_heap import BinaryMaxHeap
+    from bucket_queue import BucketQueue
+
+    half = operations // 2
+    priorities = [random.randint(0, max_priority) for _ in range(half)]
+    drops = [random.randint(0, 3) for _ in range(half)]
+
+    def batch(queue):
+        for priority in priorities:
+            queue.insert(priority)
+        for _ in range(half):
+            queue.extract_max()
+
+    def monotone(queue):
+        for priority in priorities[:1000]:
+            queue.insert(priority)
+        for drop in drops:
+            top = queue.extract_max()
+            queue.insert(max(top - drop, 0))
+
+    queues = (("BinaryMaxHeap", BinaryMaxHeap),
+              ("BucketQueue", lambda: BucketQueue(max_priority)))
+    print("%-14s %10s %13s" % ("queue", "batch (s)", "monotone (s)"))
+    for name, make in queues:
+        print("%-14s %10.3f %13.3f" % (
+            name,
+            _best_of(lambda: batch(make()), repeat=3),
+            _best_of(lambda: monotone(make()), repeat=3)))
+
+
+def pairing_merge(rounds=500, workers=8, per_worker=50, extracts=380):
+    """
+    Merge-heavy trace: every round each worker fills its own heap, all of
+    them get merged into a global heap which then serves some extracts.
+    BinaryMaxHeap.merge is linear in the size of both heaps, PairingHeap.meld
+    only links the roots.
+    """
+    import random
+    from binary_heap import BinaryMaxHeap
+    from pairing_heap import PairingHeap
+
+    batches = [[[random.random() for _ in range(per_worker)]
+                for _ in range(workers)] for _ in range(rounds)]
+
+    def trace(make):
+        main = make()
+        for batch in batches:
+            worker_heaps = [make() for _ in batch]
+            for heap, items in zip(worker_heaps, batch):
+                for item in items:
+                    heap.insert(item)
+            main.merge(*worker_heaps)
+            for _ in range(min(extracts, main.get_size())):
+                main.extract_max()
+        return main.get_size()
+
+    print("%-14s %10s" % ("heap", "time (s)"))
+    for name, make in (("BinaryMaxHeap", BinaryMaxHeap),
+                       ("PairingHeap", PairingHeap)):
+        print("%-14s %10.3f" % (name, _best_of(lambda: trace(make), repeat=3)))
+
+
+BENCHMARKS = {
+    "numpy_crossover": numpy_crossover,
+    "heap_arity": heap_arity,
+    "bucket_queue": bucket_queue,
+    "pairing_merge": pairing_merge,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Available benchmarks:", ", ".join(BENCHMARKS))
+    else:
+        start = time.time()
+        BENCHMARKS[sys.argv[1]]()
+        print("Took %.1fs" % (time.time() - start))
@@ -1,12 +1,38 @@
 
 
+import os
+import pickle
+import shutil
+import tempfile
+from itertools import islice
+from math import log2
+from operator import gt, lt
+
+# Number of items pickled together in a sorted run file
+_RUN_BLOCK = 1024
+_END = object()
+
+
 class BinaryMaxHeap:
     """ Max heap/Binary heap/Priority queue implementation. """
 
-    def __init__(self, arr=[]):
-        """ Pass a list on intialization to covert it into a max heap """
-        self.__size = len(arr)
-        self.__heap = arr
+    def __init__(self, arr=None, key=None, min_heap=False):
+        """
+        Pass a list on intialization to covert it into a max heap. Items are
+        ordered by key(item) when key is given, and the smallest comes first
+        when min_heap is true.
+        """
+        self._heap = [] if arr is None else arr
+        self._size = len(self._heap)
+        self._key = key
+        # Keys are kept in a parallel list, without key function the items
+        # are their own keys so both names point to the same list.
+        if key is None:
+            self._keys = self._heap
+        else:
+            self._keys = [key(item) for item in self._heap]
+        # Tells if first argument should be above the second one in the heap
+        self._higher = lt if min_heap else gt
         self._heapify()
 
     def _heapify(self):
@@ -14,7 +40,7 @@ class BinaryMaxHeap:
         Heapify the current heap, start from the parent of leaf nodes till
         root and use shift_down on every one of them to fix the tree.
         """
-        count = int(self.__size / 2)
+        count = int(self._size / 2)
         while count != 0:
             self._shift_down(count)
             count -= 1
@@ -37,126 +63,704 @@ class BinaryMaxHeap:
     def _shift_up(self, index):
         """
         Shift the element up until the max heap property is satisfied that is
-        parent value must be greater than both children.
+        parent value must be greater than both children. The element is taken
+        out leaving a hole, smaller parents are moved down into the hole and
+        the element is written once at the end. Returns its new index.
         """
-        if index == 1:  # can't move root further up
-            return
-        heap = self.__heap
-        p_index = self._get_parent_index(index)
+        heap, keys, higher = self._heap, self._keys, self._higher
         # Since I'm using 0 based indexing need to subtract by 1 to get actual
         # address in the list.
-        arr_idx, p_arr_idx = index - 1, p_index - 1
-        value = heap[arr_idx]
-        parent_value = heap[p_arr_idx]
-        if value > parent_value:
-            # Swap and repeat...
-            heap[arr_idx], heap[p_arr_idx] = heap[p_arr_idx], heap[arr_idx]
-            self._shift_up(p_index)
+        pos = index - 1
+        item, key = heap[pos], keys[pos]
+        while pos:
+            parent = (pos - 1) >> 1
+            parent_key = keys[parent]
+            if not higher(key, parent_key):
+                break
+            heap[pos], keys[pos] = heap[parent], parent_key
+            pos = parent
+        heap[pos], keys[pos] = item, key
+        return pos + 1
 
     def _shift_down(self, index):
         """
         Shift the item down utill the max heap property is satisfied that is
-        parent value must be greater than both children.
+        parent value must be greater than both children. Works with a hole
+        like _shift_up, the worthy child moves up on every level. Returns the
+        new index of the item.
         """
-        heap = self.__heap
-        lc_index = self._get_left_child_index(index)
-        rc_index = self._get_right_child_index(index)
-        # Since I'm using 0 based indexing need to subtract by 1 to get actual
-        # address in the list.
-        arr_idx, lc_arr_idx, rc_arr_idx = index - 1, lc_index - 1, rc_index - 1
+        heap, keys, higher = self._heap, self._keys, self._higher
+        size = self._size
+        pos = index - 1
+        item, key = heap[pos], keys[pos]
+        child = 2 * pos + 1
+        while child < size:
+            # If both are the there then check for the worthy child
+            right = child + 1
+            if right < size and higher(keys[right], keys[child]):
+                child = right
+            if not higher(keys[child], key):
+                break
+            heap[pos], keys[pos] = heap[child], keys[child]
+            pos = child
+            child = 2 * pos + 1
+        heap[pos], keys[pos] = item, key
+        return pos + 1
 
-        try:
-            lc_value = heap[lc_arr_idx]
-        except IndexError:
-            lc_value = None
+    def _append(self, item):
+        self._heap.append(item)
+        if self._key is not None:
+            self._keys.append(self._key(item))
+        self._size += 1
 
-        try:
-            rc_value = heap[rc_arr_idx]
-        except IndexError:
-            rc_value = None
-
-        if rc_value and lc_value:
-            # If both are the there then check for the worthy child to swap
-            if rc_value > lc_value:
-                cmp_value, cmp_index, cmp_arr_idx = rc_value, rc_index, rc_arr_idx  # noqa
-            else:
-                cmp_value, cmp_index, cmp_arr_idx = lc_value, lc_index, lc_arr_idx  # noqa
-        elif lc_value:
-            cmp_value, cmp_index, cmp_arr_idx = lc_value, lc_index, lc_arr_idx
-        elif rc_value:
-            cmp_value, cmp_index, cmp_arr_idx = rc_value, rc_index, rc_arr_idx
-        else:
-            # it's a leaf, can't move further down
-            return
-        value = heap[arr_idx]
-        if value < cmp_value:
-            # Swap and repeat...
-            heap[arr_idx], heap[cmp_arr_idx] = heap[cmp_arr_idx], heap[arr_idx]
-            self._shift_down(cmp_index)
+    def _pop_last(self):
+        if self._keys is not self._heap:
+            self._keys.pop()
+        self._size -= 1
+        return self._heap.pop()
+
+    def _set(self, index, item, key):
+        self._heap[index - 1] = item
+        self._keys[index - 1] = key
 
     def insert(self, item):
-        self.__heap.append(item)
-        self.__size += 1
-        self._shift_up(self.__size)
+        self._append(item)
+        self._shift_up(self._size)
+
+    def push_many(self, iterable):
+        """
+        Insert all the items, either one by one or by appending them all and
+        heapifying again, whichever needs less work.
+        """
+        items = list(iterable)
+        count, total = len(items), self._size + len(items)
+        if not count:
+            return
+        # heapify costs about 2 moves per item, inserts log2(n) each
+        if count * log2(total) > 2 * total:
+            for item in items:
+                self._append(item)
+            self._heapify()
+        else:
+            for item in items:
+                self._append(item)
+                self._shift_up(self._size)
+
+    def pushpop(self, item):
+        """
+        Insert the item and then extract the max, with at most one sift.
+        """
+        key = item if self._key is None else self._key(item)
+        if not self._size or not self._higher(self._keys[0], key):
+            # Item would be the max itself
+            return item
+        top = self._heap[0]
+        self._set(1, item, key)
+        self._shift_down(1)
+        return top
+
+    def replace(self, item):
+        """
+        Extract the max and then insert the item, with one sift.
+        """
+        if not self._size:
+            raise IndexError
+        key = item if self._key is None else self._key(item)
+        top = self._heap[0]
+        self._set(1, item, key)
+        self._shift_down(1)
+        return top
+
+    def merge(self, *heaps):
+        """
+        Add all items of the other heaps (left unchanged) into this one in
+        linear time, by appending them and heapifying once.
+        """
+        for heap in heaps:
+            for item in heap._items():
+                self._append(item)
+        self._heapify()
+        return self
+
+    def _items(self):
+        """ List of the stored items, in heap order. """
+        return list(self._heap)
 
     def get_max(self):
         """ Returns max without removing it. """
-        if self.__heap:
-            _max = self.__heap[0]
+        if self._heap:
+            _max = self._heap[0]
         else:
             _max = None
         return _max
 
     def get_size(self):
         """ Return number of elements stored. """
-        return self.__size
+        return self._size
 
     def is_empty(self):
         """ Returns true if heap contains no elements. """
-        if self.__size:
+        if self._size:
             empty = False
         else:
             empty = True
         return empty
 
+    def __len__(self):
+        return self.get_size()
+
     def extract_max(self):
         """ Returns the max item by removing it. """
-        if not self.__size:
+        if not self._size:
             raise IndexError
-        heap = self.__heap
-        if self.__size - 1:
-            _max = heap[0]
-            # Copy the last element to root and remove the copy from end then
-            # start shifting it down.
-            heap[0] = heap[-1]
-            del heap[-1]
+        _max = self._heap[0]
+        # Move the last element to root and start shifting it down.
+        last_key = self._keys[-1]
+        last = self._pop_last()
+        if self._size:
+            self._set(1, last, last_key)
             self._shift_down(1)
-        else:  # Then there is only one element.
-            _max = heap.pop()
-        self.__size -= 1
         return _max
 
     def remove(self, index):
         """ Removes the item from index x, index start from 1 for heap. """
-        # Make the given index's value infinity, bubble it up to root and then
-        # call extract_max to remove :)
-        self.__heap[index - 1] = float("inf")
-        self._shift_up(index)
-        self.extract_max()
+        if not 1 <= index <= self._size:
+            raise IndexError
+        item = self._heap[index - 1]
+        # Fill the hole with the last element, then it has to move either up
+        # or down to its place.
+        last_key = self._keys[-1]
+        last = self._pop_last()
+        if index <= self._size:
+            self._set(index, last, last_key)
+            if self._shift_up(index) == index:
+                self._shift_down(index)
+        return item
+
+    def __repr__(self):
+        return str(self._heap)
+
+
+class BinaryMinHeap(BinaryMaxHeap):
+    """ Binary heap which keeps the smallest item (by key) on top. """
+
+    def __init__(self, arr=None, key=None):
+        super().__init__(arr, key=key, min_heap=True)
+
+    def get_min(self):
+        """ Returns min without removing it. """
+        return self.get_max()
+
+    def extract_min(self):
+        """ Returns the min item by removing it. """
+        return self.extract_max()
+
+
+class DaryHeap(BinaryMaxHeap):
+    """
+    Heap where every node has d children instead of 2 (same API as
+    BinaryMaxHeap). A wider heap is shallower, so inserts (sift up) get
+    cheaper while extracts compare more children per level. Items are laid
+    out 0 based, children of position i are at d * i + 1 .. d * i + d.
+    """
+
+    def __init__(self, arr=None, d=4, key=None, min_heap=False):
+        if d < 2:
+            raise ValueError("Heap needs at least 2 children per node!!")
+        self.d = d
+        super().__init__(arr, key=key, min_heap=min_heap)
+
+    def _heapify(self):
+        """ Shift down every parent, starting from the last one. """
+        for index in range((self._size - 2) // self.d + 1, 0, -1):
+            self._shift_down(index)
+
+    def _shift_up(self, index):
+        heap, keys, higher, d = self._heap, self._keys, self._higher, self.d
+        pos = index - 1
+        item, key = heap[pos], keys[pos]
+        while pos:
+            parent = (pos - 1) // d
+            parent_key = keys[parent]
+            if not higher(key, parent_key):
+                break
+            heap[pos], keys[pos] = heap[parent], parent_key
+            pos = parent
+        heap[pos], keys[pos] = item, key
+        return pos + 1
+
+    def _shift_down(self, index):
+        heap, keys, higher, d = self._heap, self._keys, self._higher, self.d
+        pick = min if higher is lt else max
+        size = self._size
+        pos = index - 1
+        item, key = heap[pos], keys[pos]
+        child = d * pos + 1
+        while child < size:
+            # Find the worthy child among the (up to) d children in one call
+            children = keys[child:child + d]
+            best_key = pick(children)
+            best = child + children.index(best_key)
+            if not higher(best_key, key):
+                break
+            heap[pos], keys[pos] = heap[best], best_key
+            pos = best
+            child = d * pos + 1
+        heap[pos], keys[pos] = item, key
+        return pos + 1
+
+
+class _Entry:
+    """ Item stored in a LazyDeletionHeap, also used as its handle. """
+
+    __slots__ = ("item", "key", "alive")
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+        self.alive = True
+
+    def __repr__(self):
+        return "%s(item=%r, alive=%r)" % (self.__class__.__name__, self.item,
+                                          self.alive)
+
+
+class LazyDeletionHeap(BinaryMaxHeap):
+    """
+    Heap where cancelling an item is O(1): the entry is only marked as dead
+    and skipped by get_max/extract_max. Once more than compact_threshold of
+    the stored entries are dead they are dropped and the heap is heapified
+    again, so memory stays bounded and the cost is amortized over cancels.
+    insert returns a handle which can be passed to cancel, hashable items can
+    be cancelled by value too.
+    """
+
+    def __init__(self, arr=None, key=None, min_heap=False,
+                 compact_threshold=0.5):
+        if not 0 < compact_threshold < 1:
+            raise ValueError("compact_threshold must be between 0 and 1!!")
+        self.compact_threshold = compact_threshold
+        self._item_key = key
+        self._dead = 0
+        # item -> live entries holding it (as keys of an insertion ordered
+        # dict, so forgetting one is O(1)), for cancelling by value
+        self._by_item = {}
+        super().__init__(key=lambda entry: entry.key, min_heap=min_heap)
+        if arr:
+            self.push_many(arr)
+
+    def _new_entry(self, item):
+        key = item if self._item_key is None else self._item_key(item)
+        entry = _Entry(item, key)
+        try:
+            self._by_item.setdefault(item, {})[entry] = None
+        except TypeError:
+            pass  # Unhashable, can only be cancelled through its handle
+        return entry
+
+    def _forget(self, entry):
+        try:
+            entries = self._by_item[entry.item]
+        except (KeyError, TypeError):
+            return
+        del entries[entry]
+        if not entries:
+            del self._by_item[entry.item]
+
+    def _drop_dead_top(self):
+        while self._size and not self._heap[0].alive:
+            super().extract_max()
+            self._dead -= 1
+
+    def _compact(self):
+        """ Drop all dead entries and heapify the live ones. """
+        live = [entry for entry in self._heap if entry.alive]
+        self._heap[:] = live
+        self._keys[:] = [entry.key for entry in live]
+        self._size = len(live)
+        self._dead = 0
+        self._heapify()
+
+    def insert(self, item):
+        """ Adds item, returns its handle for cancel. """
+        entry = self._new_entry(item)
+        super().insert(entry)
+        return entry
+
+    def push_many(self, iterable):
+        super().push_many([self._new_entry(item) for item in iterable])
+
+    def pushpop(self, item):
+        self.insert(item)
+        return self.extract_max()
+
+    def replace(self, item):
+        top = self.extract_max()
+        self.insert(item)
+        return top
+
+    def merge(self, *heaps):
+        self.push_many(item for heap in heaps for item in heap._items())
+        return self
+
+    def cancel(self, item_or_handle):
+        """
+        Marks the entry (a handle returned by insert, or one entry holding
+        the item) as dead. Returns False if it was already removed.
+        """
+        if isinstance(item_or_handle, _Entry):
+            entry = item_or_handle
+        else:
+            entries = self._by_item.get(item_or_handle)
+            if not entries:
+                raise KeyError(F"{item_or_handle} not found in heap!!")
+            entry = next(iter(entries))
+        if not entry.alive:
+            return False
+        entry.alive = False
+        self._forget(entry)
+        self._dead += 1
+        if self._dead > self.compact_threshold * self._size:
+            self._compact()
+        return True
+
+    def get_max(self):
+        """ Returns max without removing it. """
+        self._drop_dead_top()
+        return self._heap[0].item if self._size else None
+
+    def extract_max(self):
+        """ Returns the max item by removing it. """
+        self._drop_dead_top()
+        entry = super().extract_max()
+        entry.alive = False
+        self._forget(entry)
+        return entry.item
+
+    def remove(self, index):
+        """ Removes the item from index x, index start from 1 for heap. """
+        entry = super().remove(index)
+        if entry.alive:
+            entry.alive = False
+            self._forget(entry)
+        else:
+            self._dead -= 1
+        return entry.item
+
+    def get_size(self):
+        """ Return number of (live) elements stored. """
+        return self._size - self._dead
+
+    def is_empty(self):
+        """ Returns true if heap contains no live elements. """
+        return not self.get_size()
+
+    def _items(self):
+        return [entry.item for entry in self._heap if entry.alive]
+
+    def __repr__(self):
+        return str(self._items())
+
+
+class IndexedPriorityQueue(BinaryMaxHeap):
+    """
+    Priority queue of (hashable) handles, each with a priority which can be
+    changed or removed in place. A handle -> position map is updated on every
+    move so callers never deal with positions.
+    """
+
+    def __init__(self, min_heap=False):
+        super().__init__(min_heap=min_heap)
+        # Priorities are kept apart from the handles
+        self._keys = []
+        self._positions = {}
+
+    def _shift_up(self, index):
+        """ Same as BinaryMaxHeap._shift_up but tracks every moved handle. """
+        heap, keys, higher = self._heap, self._keys, self._higher
+        positions = self._positions
+        pos = index - 1
+        handle, key = heap[pos], keys[pos]
+        while pos:
+            parent = (pos - 1) >> 1
+            parent_key = keys[parent]
+            if not higher(key, parent_key):
+                break
+            heap[pos], keys[pos] = heap[parent], parent_key
+            positions[heap[pos]] = pos
+            pos = parent
+        heap[pos], keys[pos] = handle, key
+        positions[handle] = pos
+        return pos + 1
+
+    def _shift_down(self, index):
+        """
+        Same as BinaryMaxHeap._shift_down but tracks every moved handle.
+        """
+        heap, keys, higher = self._heap, self._keys, self._higher
+        positions = self._positions
+        size = self._size
+        pos = index - 1
+        handle, key = heap[pos], keys[pos]
+        child = 2 * pos + 1
+        while child < size:
+            right = child + 1
+            if right < size and higher(keys[right], keys[child]):
+                child = right
+            if not higher(keys[child], key):
+                break
+            heap[pos], keys[pos] = heap[child], keys[child]
+            positions[heap[pos]] = pos
+            pos = child
+            child = 2 * pos + 1
+        heap[pos], keys[pos] = handle, key
+        positions[handle] = pos
+        return pos + 1
+
+    def _set(self, index, handle, priority):
+        super()._set(index, handle, priority)
+        self._positions[handle] = index - 1
+
+    def insert(self, handle, priority):
+        """ Adds handle with given priority. """
+        if handle in self._positions:
+            raise ValueError(F"{handle} is already in the queue!!")
+        self._heap.append(handle)
+        self._keys.append(priority)
+        self._positions[handle] = self._size
+        self._size += 1
+        self._shift_up(self._size)
+
+    def push_many(self, pairs):
+        """ Adds all the (handle, priority) pairs. """
+        for handle, priority in pairs:
+            self.insert(handle, priority)
+
+    def pushpop(self, handle, priority):
+        """
+        Inserts the handle and then extracts the max, with at most one sift.
+        Returns (handle, priority) of the extracted one.
+        """
+        if handle in self._positions:
+            raise ValueError(F"{handle} is already in the queue!!")
+        if not self._size or not self._higher(self._keys[0], priority):
+            # Handle would be the max itself
+            return handle, priority
+        top = self._heap[0], self._keys[0]
+        del self._positions[top[0]]
+        self._set(1, handle, priority)
+        self._shift_down(1)
+        return top
+
+    def replace(self, handle, priority):
+        """
+        Extracts the max and then inserts the handle, with one sift. Returns
+        (handle, priority) of the extracted one.
+        """
+        if not self._size:
+            raise IndexError
+        top = self._heap[0], self._keys[0]
+        if handle in self._positions and handle != top[0]:
+            raise ValueError(F"{handle} is already in the queue!!")
+        del self._positions[top[0]]
+        self._set(1, handle, priority)
+        self._shift_down(1)
+        return top
+
+    def merge(self, *queues):
+        """
+        Adds the (handle, priority) pairs of the other queues (left unchanged)
+        into this one in linear time, by appending them and heapifying once.
+        """
+        pairs = [pair for queue in queues for pair in queue._items()]
+        handles = set(self._positions)
+        for handle, _ in pairs:
+            if handle in handles:
+                raise ValueError(F"{handle} is already in the queue!!")
+            handles.add(handle)
+        for handle, priority in pairs:
+            self._heap.append(handle)
+            self._keys.append(priority)
+            self._positions[handle] = self._size
+            self._size += 1
+        self._heapify()
+        return self
+
+    def _items(self):
+        """ List of the stored (handle, priority) pairs, in heap order. """
+        return list(zip(self._heap, self._keys))
+
+    def get_max(self):
+        """ Returns (handle, priority) of the max without removing it. """
+        if not self._size:
+            return None
+        return self._heap[0], self._keys[0]
+
+    def extract_max(self):
+        """ Returns (handle, priority) of the max by removing it. """
+        if not self._size:
+            raise IndexError
+        priority = self._keys[0]
+        handle = super().extract_max()
+        del self._positions[handle]
+        return handle, priority
+
+    def get_priority(self, handle):
+        """ Returns priority of the handle. """
+        return self._keys[self._positions[handle]]
+
+    def update_priority(self, handle, priority):
+        """
+        Changes priority of the handle, it moves up or down accordingly.
+        """
+        index = self._positions[handle] + 1
+        self._keys[index - 1] = priority
+        if self._shift_up(index) == index:
+            self._shift_down(index)
+
+    def remove(self, handle):
+        """ Removes the handle, returns its priority. """
+        index = self._positions[handle] + 1
+        priority = self._keys[index - 1]
+        super().remove(index)
+        del self._positions[handle]
+        return priority
+
+    def contains(self, handle):
+        """ Returns true if handle is in the queue. """
+        return handle in self._positions
+
+    def __contains__(self, handle):
+        return self.contains(handle)
 
     def __repr__(self):
-        return str(self.__heap)
+        return str(self._items())
+
+
+def _n_best(n, iterable, key, largest):
+    """
+    Keeps the n best items of the stream in a bounded heap which has the
+    worst of them on top, so each new item is one comparison or one sift.
+    """
+    if n <= 0:
+        return []
+    heap = BinaryMaxHeap(key=key, min_heap=largest)
+    for item in iterable:
+        if heap.get_size() < n:
+            heap.insert(item)
+        else:
+            heap.pushpop(item)
+    best = [heap.extract_max() for _ in range(heap.get_size())]
+    best.reverse()
+    return best
+
+
+def nlargest(n, iterable, key=None):
+    """
+    Returns the n largest items of iterable (largest first), using O(n)
+    memory however long the iterable is.
+    """
+    return _n_best(n, iterable, key, largest=True)
+
+
+def nsmallest(n, iterable, key=None):
+    """
+    Returns the n smallest items of iterable (smallest first), using O(n)
+    memory however long the iterable is.
+    """
+    return _n_best(n, iterable, key, largest=False)
 
 
-def heap_sort(arr):
+def heap_sort(arr, key=None):
     """
     Takes the unsorted array in arguments and returns a sorted array using
-    heap sort algorithm.
+    heap sort algorithm (largest first), arr is left unchanged.
     """
-    heap = BinaryMaxHeap(arr=arr)
+    heap = BinaryMaxHeap(arr=list(arr), key=key)
     return [heap.extract_max() for i in range(heap.get_size())]
 
 
+def _write_run(items, key, path):
+    """
+    Heap sorts one run and writes it to path as pickled blocks.
+    """
+    items = heap_sort(items, key=key)
+    with open(path, "wb") as file:
+        for start in range(0, len(items), _RUN_BLOCK):
+            pickle.dump(items[start:start + _RUN_BLOCK], file,
+                        pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    """ Yields the items of a run file, one block in memory at a time. """
+    with open(path, "rb") as file:
+        while True:
+            try:
+                block = pickle.load(file)
+            except EOFError:
+                return
+            yield from block
+
+
+def _chunks(iterator, size, first):
+    chunk = first
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def external_heap_sort(iterable, chunk_size=100000, key=None, tmpdir=None):
+    """
+    Returns an iterator over the items of iterable sorted like heap_sort
+    (largest first) for inputs which don't fit in memory. The input is read
+    in chunks of chunk_size items, each chunk is heap sorted into a temporary
+    run file and the runs are merged with a k-way heap merge. Only a chunk
+    and one block per run are kept in memory.
+    """
+    # Checked here, not in the generator, so bad arguments fail right away
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1!!")
+    return _external_heap_sort(iterable, chunk_size, key, tmpdir)
+
+
+def _external_heap_sort(iterable, chunk_size, key, tmpdir):
+    iterator = iter(iterable)
+    first = list(islice(iterator, chunk_size))
+    if len(first) < chunk_size:
+        # Everything fits in one chunk, no need to go through the disk
+        yield from heap_sort(first, key=key)
+        return
+
+    run_dir = tempfile.mkdtemp(prefix="heap_sort_", dir=tmpdir)
+    runs = []
+    try:
+        paths = []
+        for i, chunk in enumerate(_chunks(iterator, chunk_size, first)):
+            path = os.path.join(run_dir, "run_%d" % i)
+            paths.append(_write_run(chunk, key, path))
+
+        runs = [_read_run(path) for path in paths]
+        # Heap of (head item, run number), advanced with the fused replace
+        if key is None:
+            heap = BinaryMaxHeap(key=lambda entry: entry[0])
+        else:
+            heap = BinaryMaxHeap(key=lambda entry: key(entry[0]))
+        heap.push_many((next(run), i) for i, run in enumerate(runs))
+        while not heap.is_empty():
+            item, i = heap.get_max()
+            yield item
+            following = next(runs[i], _END)
+            if following is _END:
+                heap.extract_max()
+            else:
+                heap.replace((following, i))
+    finally:
+        for run in runs:
+            run.close()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
     print("=========> Without passing array in __init__ <=========")
     heap = BinaryMaxHeap()
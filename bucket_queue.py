@@ -0,0 +1,96 @@
+class BucketQueue:
+    """
+    Priority queue for small integer priorities (0 till max_priority), with
+    the same interface as BinaryMaxHeap. Items are kept in one bucket per
+    priority and a cursor points at the top bucket, so insert is O(1) and
+    extract_max only walks the cursor down over empty buckets. When the
+    extracted priorities never go up again (monotone use, like hop counts or
+    ticks) the whole run costs O(n + max_priority).
+    """
+
+    def __init__(self, max_priority, key=None, min_heap=False):
+        """
+        Priority of an item is key(item) or the item itself. With min_heap
+        the smallest priority comes out first.
+        """
+        if max_priority < 0:
+            raise ValueError("max_priority can't be negative!!")
+        self.max_priority = max_priority
+        self._buckets = [[] for _ in range(max_priority + 1)]
+        self._size = 0
+        self._key = key
+        self._min_heap = min_heap
+        # Top bucket (or past the end when empty)
+        self._cursor = max_priority + 1 if min_heap else -1
+
+    def _priority(self, item):
+        priority = item if self._key is None else self._key(item)
+        if not 0 <= priority <= self.max_priority:
+            raise ValueError(
+                F"Priority {priority} out of range 0..{self.max_priority}!!")
+        return priority
+
+    def _top_bucket(self):
+        """ Moves the cursor to the first non empty bucket and returns it. """
+        buckets, cursor = self._buckets, self._cursor
+        step = 1 if self._min_heap else -1
+        while not buckets[cursor]:
+            cursor += step
+        self._cursor = cursor
+        return buckets[cursor]
+
+    def insert(self, item):
+        priority = self._priority(item)
+        self._buckets[priority].append(item)
+        self._size += 1
+        if self._min_heap:
+            if priority < self._cursor:
+                self._cursor = priority
+        elif priority > self._cursor:
+            self._cursor = priority
+
+    def get_max(self):
+        """ Returns max without removing it. """
+        if not self._size:
+            return None
+        return self._top_bucket()[-1]
+
+    def extract_max(self):
+        """ Returns the max item by removing it. """
+        if not self._size:
+            raise IndexError
+        self._size -= 1
+        return self._top_bucket().pop()
+
+    def get_size(self):
+        """ Return number of elements stored. """
+        return self._size
+
+    def is_empty(self):
+        """ Returns true if queue contains no elements. """
+        return not self._size
+
+    def __repr__(self):
+        buckets = self._buckets
+        if not self._min_heap:
+            buckets = reversed(buckets)
+        return str([item for bucket in buckets for item in reversed(bucket)])
+
+
+if __name__ == "__main__":
+    queue = BucketQueue(10)
+    for priority in (3, 7, 1, 7, 0, 10):
+        queue.insert(priority)
+    print("Queue       ====>", queue)
+    print("size        ====>", queue.get_size())
+    print("get_max     ====>", queue.get_max())
+    print("extract_max ====>", queue.extract_max())
+    print("extract_max ====>", queue.extract_max())
+    print("Queue       ====>", queue)
+
+    queue = BucketQueue(100, key=lambda task: task[0], min_heap=True)
+    queue.insert((5, "retry"))
+    queue.insert((2, "send"))
+    queue.insert((9, "cleanup"))
+    print("Min queue   ====>", queue)
+    print("extract_max ====>", queue.extract_max())
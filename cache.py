@@ -0,0 +1,207 @@
+import time
+from functools import wraps
+
+from hash_table import HashTable
+
+_MISSING = object()
+
+
+class _Link:
+    """ Entry of the recency list. """
+
+    __slots__ = ("key", "value", "expires", "prev", "next")
+
+    def __init__(self, key=None, value=None, expires=None):
+        self.key = key
+        self.value = value
+        self.expires = expires
+        self.prev = self.next = self
+
+
+class LRUCache:
+    """
+    Cache on top of HashTable. Keys map to links of a doubly linked list
+    kept in recency order, so get, put and evicting the least recently used
+    entry once there are maxsize of them are all O(1). Entries can have a
+    time to live: expired ones are dropped when accessed, and a sweep over
+    all entries runs at most once every sweep_interval seconds (on put).
+    """
+
+    def __init__(self, maxsize=128, ttl=None, sweep_interval=None,
+                 clock=time.monotonic):
+        """
+        maxsize None means no limit, ttl is the default time to live in
+        seconds (None: never expires), sweep_interval defaults to ttl.
+        """
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be at least 1!!")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval if sweep_interval else ttl
+        self._clock = clock
+        self._table = HashTable()
+        # Sentinel of the circular list, root.next is the least recent
+        self._root = _Link()
+        self._next_sweep = None
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _unlink(self, link):
+        link.prev.next = link.next
+        link.next.prev = link.prev
+
+    def _append(self, link):
+        """ Links as the most recent entry. """
+        root = self._root
+        link.prev, link.next = root.prev, root
+        root.prev.next = link
+        root.prev = link
+
+    def _drop(self, link):
+        self._unlink(link)
+        del self._table[link.key]
+
+    def _lookup(self, key):
+        """ Returns the live link of the key, None if missing or expired. """
+        link = self._table.get(key)
+        if link is None:
+            return None
+        if link.expires is not None and link.expires <= self._clock():
+            self._drop(link)
+            self.expirations += 1
+            return None
+        return link
+
+    def get(self, key, default=None):
+        """ Returns value of the key (marking it as recent) or default. """
+        link = self._lookup(key)
+        if link is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._unlink(link)
+        self._append(link)
+        return link.value
+
+    def put(self, key, value, ttl=_MISSING):
+        """
+        Stores value for the key, expiring after ttl seconds (the cache's
+        default ttl if not given). Evicts the least recent entry when full.
+        """
+        if ttl is _MISSING:
+            ttl = self.ttl
+        now = self._clock() if ttl is not None or self.sweep_interval else 0
+        expires = None if ttl is None else now + ttl
+        if self.sweep_interval:
+            if self._next_sweep is None:
+                self._next_sweep = now + self.sweep_interval
+            elif now >= self._next_sweep:
+                self.sweep()
+        link = self._lookup(key)
+        if link is not None:
+            link.value, link.expires = value, expires
+            self._unlink(link)
+            self._append(link)
+            return
+        if self.maxsize is not None and len(self._table) >= self.maxsize:
+            self._drop(self._root.next)
+            self.evictions += 1
+        link = _Link(key, value, expires)
+        self._table[key] = link
+        self._append(link)
+
+    def sweep(self):
+        """ Removes all the expired entries, returns how many. """
+        now = self._clock()
+        removed = 0
+        link = self._root.next
+        while link is not self._root:
+            following = link.next
+            if link.expires is not None and link.expires <= now:
+                self._drop(link)
+                removed += 1
+            link = following
+        self.expirations += removed
+        if self.sweep_interval:
+            self._next_sweep = now + self.sweep_interval
+        return removed
+
+    def clear(self):
+        self._table = HashTable()
+        self._root.prev = self._root.next = self._root
+
+    def stats(self):
+        """ Hit/miss/eviction/expiration counters and current size. """
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "size": len(self)}
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise Exception(F"Key: {key} not found!!")
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        link = self._lookup(key)
+        if link is None:
+            raise Exception(F"Key: {key} not found!!")
+        self._drop(link)
+
+    def __repr__(self):
+        elements = []
+        link = self._root.next
+        while link is not self._root:
+            elements.append(str(link.key) + ': ' + str(link.value))
+            link = link.next
+        return "{" + ", ".join(elements) + "}"
+
+
+def memoize(maxsize=128, ttl=None):
+    """
+    Decorator caching the results of a function (with hashable arguments)
+    in an LRUCache, available as the wrapper's cache attribute.
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args
+            if kwargs:
+                key += (_MISSING,) + tuple(sorted(kwargs.items()))
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    cache = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    print("get a       ====>", cache.get("a"))
+    cache["c"] = 3
+    print("Cache       ====>", cache)
+    print("get b       ====>", cache.get("b"))
+    print("stats       ====>", cache.stats())
+
+    @memoize(maxsize=100)
+    def fibonacci(n):
+        return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+    print("fib(80)     ====>", fibonacci(80))
+    print("stats       ====>", fibonacci.cache.stats())
@@ -1,12 +1,64 @@
+from ctypes import c_uint8, c_uint16, c_uint32, c_uint64, sizeof
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, batch lookups fall back to python
+    np = None
+
+# Value of a key removed from the old table during an incremental resize, the
+# key itself stays so probing for the others still works.
+_DELETED = object()
+# Default of get telling a missing key from a stored value
+_MISSING = object()
+
 
 class HashTable:
 
-    def __init__(self):
-        self.size = 8
+    # Smallest batch for which get_many/contains_many use numpy on their own
+    NUMPY_THRESHOLD = 1024
+    # Hash of an int is the int itself inside this range (except -1)
+    _HASH_MODULUS = (1 << 61) - 1
+
+    def __init__(self, incremental=False, migrate_step=16, capacity=None):
+        """
+        With incremental, growing the table doesn't rehash everything at
+        once: the old table is kept and every operation moves migrate_step
+        of its slots to the new one, so no single operation takes O(n).
+        With capacity, the table starts big enough to hold that many keys
+        without resizing.
+        """
+        # A migration has to move all the old slots before the next growth,
+        # which comes 2/3 of the old size of inserts later, or that growth
+        # moves the rest at once. So it takes at least 2 slots per step.
+        if migrate_step < 2:
+            raise ValueError("migrate_step must be at least 2!!")
+        self.max_load_factor = 2/3
+        self.size = self._size_for(capacity or 0)
         self.length = 0
         self.slots = [None] * self.size
         self.data = [None] * self.size
-        self.max_load_factor = 2/3
+        # hash(key) of every slot's key, so probing and resizing never hash
+        # stored keys again
+        self.hashes = [None] * self.size
+        self.incremental = incremental
+        self.migrate_step = migrate_step
+        # (slots, data, hashes) of the previous table while an incremental
+        # resize is going on, slots before _cursor are already moved.
+        self._old = None
+        self._cursor = 0
+        # Bumped whenever keys move, see _np_table
+        self._version = 0
+        self._np_cache = None
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Table holding the given mapping or (key, value) pairs, sized for all
+        of them up front.
+        """
+        table = cls(**kwargs)
+        table.update(items)
+        return table
 
     def __len__(self):
         return self.length
@@ -24,11 +76,8 @@ class HashTable:
         start = "{"
         end = "}"
         elements = ""
-        for i in range(self.size):
-            if self.slots[i] not in (None, ""):
-                key = self.slots[i]
-                value = self.data[i]
-                elements += str(key) + ': ' + str(value) + ", "
+        for key, value in self.items():
+            elements += str(key) + ': ' + str(value) + ", "
 
         elements = elements[:-2]  # Remove last ', '
         if elements:
@@ -37,86 +86,508 @@ class HashTable:
             display = start + end
         return display
 
+    def items(self):
+        """ Yields (key, value) of all the entries. """
+        for i in range(self.size):
+            if self.slots[i] is not None:
+                yield self.slots[i], self.data[i]
+        if self._old is not None:
+            slots, data, _ = self._old
+            for i in range(self._cursor, len(slots)):
+                if slots[i] is not None and data[i] is not _DELETED:
+                    yield slots[i], data[i]
+
+    def _size_for(self, count):
+        """ Smallest table size holding count keys below the load factor. """
+        size = 8
+        while count >= size * self.max_load_factor:
+            size *= 2
+        return size
+
     def _hash(self, key):
         return hash(key) % self.size
 
     def _increment(self, slot_no):
         return (slot_no + 1) % self.size
 
-    def _resize(self):
+    def _probe_distance(self, slot_no):
+        """
+        How far the key in slot_no is from its home slot (where _hash puts
+        it), robin hood hashing keeps the keys sorted by this in every run.
+        """
+        return (slot_no - self.hashes[slot_no] % self.size) % self.size
+
+    def _resize(self, size=None):
+        """ Rehashes into a table of size slots (twice as many by default). """
         old_slots = self.slots
         old_data = self.data
-        self.size *= 2
+        old_hashes = self.hashes
+        self.size = size or self.size * 2
+        self._version += 1
         self.slots = [None] * self.size
         self.data = [None] * self.size
+        self.hashes = [None] * self.size
         for index, key in enumerate(old_slots):
-            if key not in ("", None):
-                value = old_data[index]
-                new_slot = self._hash(key)
-                self.slots[new_slot] = key
-                self.data[new_slot] = value
+            if key is not None:
+                self._place(key, old_data[index], old_hashes[index])
+
+    def _place(self, key, value, key_hash):
+        """
+        Robin hood insertion of a key which is not in the table: while
+        probing, a key further from its home slot takes the place of a
+        resident closer to its own, and the resident is carried on instead.
+        """
+        slots, data, hashes = self.slots, self.data, self.hashes
+        self._version += 1
+        slot_no = key_hash % self.size
+        distance = 0
+        while slots[slot_no] is not None:
+            resident_distance = self._probe_distance(slot_no)
+            if resident_distance < distance:
+                key, slots[slot_no] = slots[slot_no], key
+                value, data[slot_no] = data[slot_no], value
+                key_hash, hashes[slot_no] = hashes[slot_no], key_hash
+                distance = resident_distance
+            slot_no = self._increment(slot_no)
+            distance += 1
+        slots[slot_no] = key
+        data[slot_no] = value
+        hashes[slot_no] = key_hash
+
+    @staticmethod
+    def _probe(slots, hashes, key, key_hash):
+        """
+        Returns slot number holding the key in the given table, -1 if not
+        found. Probing stops at an empty slot or at a resident closer to its
+        home than the key would be, since robin hood insertion would have
+        placed the key there. Keys are only compared when their stored hash
+        codes match.
+        """
+        size = len(slots)
+        slot_no = key_hash % size
+        distance = 0
+        while slots[slot_no] is not None:
+            stored_hash = hashes[slot_no]
+            if stored_hash == key_hash and (slots[slot_no] is key
+                                            or slots[slot_no] == key):
+                return slot_no
+            if (slot_no - stored_hash % size) % size < distance:
+                break
+            slot_no = (slot_no + 1) % size
+            distance += 1
+        return -1
+
+    def _find_slot(self, key, key_hash=None):
+        """ Returns slot number holding the key, -1 if not found. """
+        if key_hash is None:
+            key_hash = hash(key)
+        return self._probe(self.slots, self.hashes, key, key_hash)
+
+    def _find_old_slot(self, key, key_hash):
+        """
+        Returns slot number of the old table holding the key if it is not
+        moved yet, -1 otherwise.
+        """
+        if self._old is None:
+            return -1
+        slots, data, hashes = self._old
+        slot_no = self._probe(slots, hashes, key, key_hash)
+        # Moved keys are still in the old slots, they don't count
+        if slot_no < self._cursor or data[slot_no] is _DELETED:
+            return -1
+        return slot_no
+
+    def _start_migration(self, size=None):
+        """
+        Switch to a table of size slots (twice as many by default), keeping
+        the old one to move.
+        """
+        if self._old is not None:
+            self._migrate(len(self._old[0]))
+        self._old = (self.slots, self.data, self.hashes)
+        self._cursor = 0
+        self._version += 1
+        self.size = size or self.size * 2
+        self.slots = [None] * self.size
+        self.data = [None] * self.size
+        self.hashes = [None] * self.size
+
+    def _migrate(self, count=None):
+        """ Moves the next count (migrate_step) slots of the old table. """
+        if self._old is None:
+            return
+        slots, data, hashes = self._old
+        stop = min(self._cursor + (count or self.migrate_step), len(slots))
+        for i in range(self._cursor, stop):
+            if slots[i] is not None and data[i] is not _DELETED:
+                self._place(slots[i], data[i], hashes[i])
+            # The key stays for probing, only the value is released
+            data[i] = None
+        self._cursor = stop
+        if stop == len(slots):
+            self._old = None
 
     def _add(self, key, value):
-        # None is being used for the empty slots and '' is being used for
-        # dummy values so can't allow these as key.
-        if key in (None, ''):
+        if self._store(key, value):
+            print("key found updating: ", key)
+
+    def _store(self, key, value):
+        """ Adds or updates the key, returns True if it was updated. """
+        # None is being used for the empty slots so can't allow it as key.
+        if key is None:
             raise Exception(F"Cannot hash {key} as key for hash table!!")
-        slot_no = self._hash(key)
-        self.length += 1
-        if self.slots[slot_no] is None:
-            self.slots[slot_no] = key
-            self.data[slot_no] = value
-        else:
-            while self.slots[slot_no] not in (None, "", key):
-                slot_no = self._increment(slot_no)
-            if self.slots[slot_no] == key:
-                print("key found updating: ", key)
-                # we're updating key so no need to increase length
-                self.length -= 1
-            self.slots[slot_no] = key
+        key_hash = hash(key)
+        self._migrate()
+        slot_no = self._find_slot(key, key_hash)
+        if slot_no != -1:
+            # we're updating key so no need to increase length
             self.data[slot_no] = value
+            return True
+        slot_no = self._find_old_slot(key, key_hash)
+        if slot_no != -1:
+            # Not moved yet, it will carry the new value when it is
+            self._old[1][slot_no] = value
+            return True
+        self._place(key, value, key_hash)
+        self.length += 1
 
         if self.length / self.size >= self.max_load_factor:
-            self._resize()
+            if self.incremental:
+                self._start_migration()
+            else:
+                self._resize()
+        return False
+
+    def update(self, items):
+        """
+        Adds a mapping or (key, value) pairs, updating the existing keys
+        silently. The table grows once, up front, to hold all of them: with
+        incremental that starts a migration to the final size which moves
+        along with the inserts like any other.
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        if not hasattr(items, "__len__"):
+            items = list(items)
+        # Pairs may repeat keys or update existing ones, so this is an
+        # upper bound and the inserts below don't grow the table again
+        size = self._size_for(self.length + len(items))
+        if size > self.size:
+            if not self.incremental:
+                self._resize(size)
+            elif self._old is None:
+                self._start_migration(size)
+        for key, value in items:
+            self._store(key, value)
 
     def _get(self, key):
-        slot_no = self._hash(key)
-        if self.slots[slot_no] is None:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
             raise Exception(F"Key: {key} not found!!")
-        else:
-            while self.slots[slot_no] not in (key, None):
-                slot_no = self._increment(slot_no)
-            if self.slots[slot_no] == key:
-                return self.data[slot_no]
-            else:
+        return value
+
+    def get(self, key, default=None):
+        """ Returns value of the key, default if it is not in the table. """
+        key_hash = hash(key)
+        self._migrate()
+        slot_no = self._find_slot(key, key_hash)
+        if slot_no != -1:
+            return self.data[slot_no]
+        slot_no = self._find_old_slot(key, key_hash)
+        if slot_no != -1:
+            return self._old[1][slot_no]
+        return default
+
+    def get_many(self, keys, default=None, vectorized=None):
+        """
+        List of the values of keys (default for the missing ones). Integer
+        keys can be probed all at once with numpy: vectorized=True asks for
+        it, by default it is used for big enough integer numpy arrays.
+        """
+        slot_nos = self._batch_slots(keys, vectorized)
+        if slot_nos is None:
+            return [self.get(key, default) for key in keys]
+        data = self.data
+        return [default if slot_no == -1 else data[slot_no]
+                for slot_no in slot_nos.tolist()]
+
+    def contains_many(self, keys, vectorized=None):
+        """ List telling for each of keys if it is in the table. """
+        slot_nos = self._batch_slots(keys, vectorized)
+        if slot_nos is None:
+            return [self.exists(key) for key in keys]
+        return (slot_nos != -1).tolist()
+
+    def _batch_slots(self, keys, vectorized):
+        """
+        numpy array of the slot numbers holding keys (-1 if missing), or None
+        when the batch is to be looked up key by key.
+        """
+        if vectorized is None:
+            vectorized = (np is not None and isinstance(keys, np.ndarray)
+                          and keys.dtype.kind in "iu"
+                          and len(keys) >= self.NUMPY_THRESHOLD)
+        if not vectorized:
+            return None
+        if np is None:
+            raise ImportError("numpy is needed for vectorized lookups!!")
+        keys = np.asarray(keys)
+        if keys.dtype.kind not in "iu":
+            raise TypeError("vectorized lookups need integer keys!!")
+        self._migrate()
+        if (self._old is not None or not keys.size
+                or abs(int(keys.min())) >= self._HASH_MODULUS
+                or int(keys.max()) >= self._HASH_MODULUS):
+            return None
+        return self._np_probe(keys.astype(np.int64))
+
+    def _np_table(self):
+        """
+        numpy snapshot of the table (occupied slots, hash codes, slots with
+        int keys and those keys), rebuilt only after the slots changed. Int
+        keys are compared in numpy, other keys of a matching hash (1.0 for
+        1...) are compared one by one.
+        """
+        if self._np_cache is None or self._np_cache[0] != self._version:
+            slots = self.slots
+            int_keys = [type(key) is int and abs(key) < self._HASH_MODULUS
+                        for key in slots]
+            self._np_cache = (self._version, (
+                np.array([key is not None for key in slots]),
+                np.array([0 if key_hash is None else key_hash
+                          for key_hash in self.hashes], dtype=np.int64),
+                np.array(int_keys),
+                np.array([key if is_int else 0 for key, is_int
+                          in zip(slots, int_keys)], dtype=np.int64)))
+        return self._np_cache[1]
+
+    def _np_probe(self, keys):
+        """
+        _probe for a whole array of ints, one probe step of all the keys
+        still searching per round.
+        """
+        size = self.size
+        occupied, stored_hashes, exact, stored_keys = self._np_table()
+        result = np.full(len(keys), -1, dtype=np.int64)
+        key_hashes = np.where(keys == -1, -2, keys)
+        active = np.arange(len(keys))
+        slot_nos = key_hashes % size
+        distance = 0
+        while active.size:
+            used = occupied[slot_nos]
+            same_hash = used & (stored_hashes[slot_nos] == key_hashes)
+            found = same_hash & exact[slot_nos] & (stored_keys[slot_nos]
+                                                   == keys)
+            for i in np.flatnonzero(same_hash & ~exact[slot_nos]).tolist():
+                found[i] = self.slots[slot_nos[i]] == int(keys[i])
+            result[active[found]] = slot_nos[found]
+            # Go on like _probe: till an empty slot or a resident closer to
+            # its home than the key would be
+            going_on = used & ~found & (
+                (slot_nos - stored_hashes[slot_nos] % size) % size
+                >= distance)
+            active = active[going_on]
+            keys = keys[going_on]
+            key_hashes = key_hashes[going_on]
+            slot_nos = (slot_nos[going_on] + 1) % size
+            distance += 1
+        return result
+
+    def _remove(self, key):
+        key_hash = hash(key)
+        self._migrate()
+        slot_no = self._find_slot(key, key_hash)
+        if slot_no == -1:
+            slot_no = self._find_old_slot(key, key_hash)
+            if slot_no == -1:
                 raise Exception(F"Key: {key} not found!!")
+            # Shifting keys in the old table would mix moved and not moved
+            # ones, so the key is only marked till the old table goes away
+            self._old[1][slot_no] = _DELETED
+            self.length -= 1
+            return
+        self._version += 1
+        # Backward shift: move the following keys of the run one slot back
+        # till an empty slot or a key in its home slot, so no tombstone is
+        # left behind.
+        next_slot = self._increment(slot_no)
+        while (self.slots[next_slot] is not None
+               and self._probe_distance(next_slot)):
+            self.slots[slot_no] = self.slots[next_slot]
+            self.data[slot_no] = self.data[next_slot]
+            self.hashes[slot_no] = self.hashes[next_slot]
+            slot_no = next_slot
+            next_slot = self._increment(next_slot)
+        self.slots[slot_no] = None
+        self.data[slot_no] = None
+        self.hashes[slot_no] = None
+        self.length -= 1
+
+    def exists(self, key):
+        key_hash = hash(key)
+        self._migrate()
+        return (self._find_slot(key, key_hash) != -1
+                or self._find_old_slot(key, key_hash) != -1)
+
+
+class CompactHashTable:
+    """
+    Hash table with the layout of CPython's dict: keys, values and hash codes
+    live in dense lists in insertion order, and the sparse table only holds
+    small integers (1, 2, 4 or 8 bytes, as per table size) pointing into
+    them. It takes much less memory than full size slots/data lists, keeps
+    insertion order and iterates in proportion to the number of entries.
+    Probing is robin hood with backward-shift deletion like HashTable.
+    """
+
+    def __init__(self):
+        self.size = 8
+        self.length = 0
+        self.max_load_factor = 2/3
+        # Dense entries, removed ones are holes (_DELETED key) till the next
+        # resize compacts them
+        self.entry_keys = []
+        self.entry_values = []
+        self.entry_hashes = []
+        # Sparse table: entry number + 1, 0 for an empty slot
+        self.indices = self._create_indices(self.size)
+
+    @staticmethod
+    def _create_indices(size):
+        for index_type in (c_uint8, c_uint16, c_uint32, c_uint64):
+            if size < 1 << (8 * sizeof(index_type)):
+                return (size * index_type)()
+        raise MemoryError("Hash table is too big!!")
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        return self._get(key)
+
+    def __setitem__(self, key, value):
+        self._add(key, value)
+
+    def __delitem__(self, key):
+        self._remove(key)
+
+    def __iter__(self):
+        return self.keys()
+
+    def items(self):
+        """ Yields (key, value) of all the entries in insertion order. """
+        for key, value in zip(self.entry_keys, self.entry_values):
+            if key is not _DELETED:
+                yield key, value
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def __repr__(self):
+        return "{" + ", ".join(str(key) + ': ' + str(value)
+                               for key, value in self.items()) + "}"
+
+    def _find_slot(self, key, key_hash):
+        """ Returns slot number pointing to the key, -1 if not found. """
+        indices, hashes = self.indices, self.entry_hashes
+        keys = self.entry_keys
+        size = self.size
+        slot_no = key_hash % size
+        distance = 0
+        while indices[slot_no]:
+            entry = indices[slot_no] - 1
+            stored_hash = hashes[entry]
+            if stored_hash == key_hash and (keys[entry] is key
+                                            or keys[entry] == key):
+                return slot_no
+            if (slot_no - stored_hash % size) % size < distance:
+                break
+            slot_no = (slot_no + 1) % size
+            distance += 1
+        return -1
+
+    def _place(self, entry):
+        """ Robin hood insertion of the entry number in the sparse table. """
+        indices, hashes = self.indices, self.entry_hashes
+        size = self.size
+        slot_no = hashes[entry] % size
+        distance = 0
+        entry += 1
+        while indices[slot_no]:
+            resident = indices[slot_no]
+            resident_distance = (slot_no - hashes[resident - 1] % size) % size
+            if resident_distance < distance:
+                indices[slot_no], entry = entry, resident
+                distance = resident_distance
+            slot_no = (slot_no + 1) % size
+            distance += 1
+        indices[slot_no] = entry
+
+    def _resize(self):
+        """
+        Drops the holes from the dense lists, doubles the sparse table if the
+        entries still fill more than half of it, and rebuilds it.
+        """
+        if self.length >= self.size * self.max_load_factor / 2:
+            self.size *= 2
+        live = [i for i, key in enumerate(self.entry_keys)
+                if key is not _DELETED]
+        self.entry_keys = [self.entry_keys[i] for i in live]
+        self.entry_values = [self.entry_values[i] for i in live]
+        self.entry_hashes = [self.entry_hashes[i] for i in live]
+        self.indices = self._create_indices(self.size)
+        for entry in range(self.length):
+            self._place(entry)
+
+    def _add(self, key, value):
+        key_hash = hash(key)
+        slot_no = self._find_slot(key, key_hash)
+        if slot_no != -1:
+            self.entry_values[self.indices[slot_no] - 1] = value
+            return
+        if len(self.entry_keys) + 1 > self.size * self.max_load_factor:
+            self._resize()
+        self.entry_keys.append(key)
+        self.entry_values.append(value)
+        self.entry_hashes.append(key_hash)
+        self._place(len(self.entry_keys) - 1)
+        self.length += 1
+
+    def _get(self, key):
+        slot_no = self._find_slot(key, hash(key))
+        if slot_no == -1:
+            raise Exception(F"Key: {key} not found!!")
+        return self.entry_values[self.indices[slot_no] - 1]
 
     def _remove(self, key):
-        slot_no = self._hash(key)
-        if self.slots[slot_no] is None:
+        indices, hashes = self.indices, self.entry_hashes
+        size = self.size
+        slot_no = self._find_slot(key, hash(key))
+        if slot_no == -1:
             raise Exception(F"Key: {key} not found!!")
-        else:
-            while self.slots[slot_no] not in (key, None):
-                slot_no = self._increment(slot_no)
-            if self.slots[slot_no] == key:
-                self.slots[slot_no] = ""
-                self.data[slot_no] = None
-                self.length -= 1
-            else:
-                raise Exception(F"Key: {key} not found!!")
+        entry = indices[slot_no] - 1
+        # Backward shift in the sparse table, then leave a hole in the dense
+        # lists (dropped right away if it's at the end)
+        next_slot = (slot_no + 1) % size
+        while (indices[next_slot]
+               and (next_slot - hashes[indices[next_slot] - 1] % size) % size):
+            indices[slot_no] = indices[next_slot]
+            slot_no = next_slot
+            next_slot = (next_slot + 1) % size
+        indices[slot_no] = 0
+        self.entry_keys[entry] = _DELETED
+        self.entry_values[entry] = None
+        self.length -= 1
+        while self.entry_keys and self.entry_keys[-1] is _DELETED:
+            self.entry_keys.pop()
+            self.entry_values.pop()
+            self.entry_hashes.pop()
 
     def exists(self, key):
-        slot_no = self._hash(key)
-        if self.slots[slot_no] is None:
-            exists = False
-        else:
-            while self.slots[slot_no] not in (key, None):
-                slot_no = self._increment(slot_no)
-            if self.slots[slot_no] == key:
-                exists = True
-            else:
-                exists = False
-        return exists
+        return self._find_slot(key, hash(key)) != -1
 
 
 if __name__ == "__main__":
@@ -160,6 +631,17 @@ if __name__ == "__main__":
 
     print("abc exists: ", h_table.exists("abc"))
     print("dbc exists: ", h_table.exists("dbc"))
+    print("get dbc:", h_table.get("dbc", "default"))
+    print("get_many:", h_table.get_many(["abc", "dbc", (1, 2)]))
+    print("contains_many:", h_table.contains_many(["abc", "dbc"]))
+
+    print("===> Bulk update <===")
+    h_table.update({"abc": "bulk abc", "i": 5, "j": 6})
+    h_table.update([("k", 7), ("l", 8)])
+    print(h_table)
+    print("size:", h_table.size)
+    print("len:", len(h_table))
+    print("from_items:", HashTable.from_items((i, i * i) for i in range(5)))
 
     print("===> Delete test <===")
     del h_table["abc"]
@@ -180,10 +662,6 @@ if __name__ == "__main__":
     print("slots:", h_table.slots)
 
     print("===> Invalid Insertion <===")
-    try:
-        h_table[""] = "ankit"
-    except Exception as e:
-        print(e)
     try:
         h_table[None] = "sagar"
     except Exception as e:
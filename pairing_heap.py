@@ -0,0 +1,213 @@
+from operator import gt, lt
+
+
+class Node:
+    """
+    Pairing heap node: first child and next sibling pointers, prev points to
+    the previous sibling or (for a first child) the parent.
+    """
+
+    __slots__ = ("item", "key", "child", "sibling", "prev")
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+        self.child = None
+        self.sibling = None
+        self.prev = None
+
+    def __repr__(self):
+        return "%s(item=%r)" % (self.__class__.__name__, self.item)
+
+
+class PairingHeap:
+    """
+    Pairing heap with the same interface as BinaryMaxHeap. The heap is a
+    tree where every node is higher than its children, insert and meld just
+    link two roots (O(1)) and extract_max pairs up the root's children in two
+    passes (amortized O(log n)). Useful when heaps get merged often.
+    """
+
+    def __init__(self, arr=None, key=None, min_heap=False):
+        """
+        Items are ordered by key(item) when key is given, and the smallest
+        comes first when min_heap is true.
+        """
+        self._root = None
+        self._size = 0
+        self._key = key
+        self._min_heap = min_heap
+        self._higher = lt if min_heap else gt
+        if arr:
+            self.push_many(arr)
+
+    def _link(self, first, second):
+        """ Makes the lower root the first child of the higher one. """
+        if self._higher(second.key, first.key):
+            first, second = second, first
+        second.sibling = first.child
+        if first.child is not None:
+            first.child.prev = second
+        first.child = second
+        second.prev = first
+        first.prev = None
+        return first
+
+    def _merge_pairs(self, node):
+        """
+        Links the sibling list starting at node into one tree: pairs left to
+        right, then folds the pairs right to left.
+        """
+        pairs = []
+        while node is not None:
+            second = node.sibling
+            if second is None:
+                node.prev = None
+                pairs.append(node)
+                break
+            following = second.sibling
+            node.sibling = second.sibling = None
+            pairs.append(self._link(node, second))
+            node = following
+        root = pairs.pop()
+        while pairs:
+            root = self._link(pairs.pop(), root)
+        return root
+
+    def insert(self, item):
+        """ Adds item, returns its node (a handle for remove). """
+        node = Node(item, item if self._key is None else self._key(item))
+        self._root = node if self._root is None else self._link(self._root,
+                                                                 node)
+        self._size += 1
+        return node
+
+    def push_many(self, iterable):
+        for item in iterable:
+            self.insert(item)
+
+    def pushpop(self, item):
+        """ Insert the item and then extract the max. """
+        key = item if self._key is None else self._key(item)
+        if self._root is None or not self._higher(self._root.key, key):
+            # Item would be the max itself
+            return item
+        top = self.extract_max()
+        self.insert(item)
+        return top
+
+    def replace(self, item):
+        """ Extract the max and then insert the item. """
+        top = self.extract_max()
+        self.insert(item)
+        return top
+
+    def meld(self, other):
+        """
+        Moves all items of the other pairing heap (left empty) into this one
+        in O(1). Both heaps must use the same ordering.
+        """
+        if other is self or other._root is None:
+            return self
+        if self._root is None:
+            self._root = other._root
+        else:
+            self._root = self._link(self._root, other._root)
+        self._size += other._size
+        other._root, other._size = None, 0
+        return self
+
+    def merge(self, *heaps):
+        """
+        Adds the items of all heaps. Pairing heaps are melded (so left
+        empty), items of other heaps are copied.
+        """
+        for heap in heaps:
+            if isinstance(heap, PairingHeap):
+                self.meld(heap)
+            else:
+                self.push_many(heap._items())
+        return self
+
+    def get_max(self):
+        """ Returns max without removing it. """
+        return None if self._root is None else self._root.item
+
+    def extract_max(self):
+        """ Returns the max item by removing it. """
+        root = self._root
+        if root is None:
+            raise IndexError
+        self._root = None if root.child is None else self._merge_pairs(
+            root.child)
+        root.child = None
+        self._size -= 1
+        return root.item
+
+    def remove(self, node):
+        """
+        Removes the item of the node returned by insert, returns the item.
+        The node's subtree is cut out, its children are paired up like in
+        extract_max and linked back to the root.
+        """
+        if node is self._root:
+            return self.extract_max()
+        if node.prev is None:
+            raise ValueError(F"{node} is not in the heap!!")
+        # Cut the node out of its sibling list
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = node.sibling = None
+        if node.child is not None:
+            self._root = self._link(self._root, self._merge_pairs(node.child))
+            node.child = None
+        self._size -= 1
+        return node.item
+
+    def get_size(self):
+        """ Return number of elements stored. """
+        return self._size
+
+    def is_empty(self):
+        """ Returns true if heap contains no elements. """
+        return self._root is None
+
+    def __len__(self):
+        return self._size
+
+    def _items(self):
+        """ List of the stored items, parents before children. """
+        items = []
+        stack = [] if self._root is None else [self._root]
+        while stack:
+            node = stack.pop()
+            items.append(node.item)
+            if node.sibling is not None:
+                stack.append(node.sibling)
+            if node.child is not None:
+                stack.append(node.child)
+        return items
+
+    def __repr__(self):
+        return str(self._items())
+
+
+if __name__ == "__main__":
+    heap = PairingHeap([13, 8, 9])
+    other = PairingHeap([7, 21, 3])
+    print("Heap        ====>", heap)
+    print("Other       ====>", other)
+    print("meld        ====>", heap.meld(other))
+    print("size        ====>", heap.get_size())
+    print("get_max     ====>", heap.get_max())
+    print("extract_max ====>", heap.extract_max())
+    print("extract_max ====>", heap.extract_max())
+    node = heap.insert(11)
+    print("remove 11   ====>", heap.remove(node))
+    print("pushpop     ====>", heap.pushpop(5))
+    print("replace     ====>", heap.replace(1))
+    print("Heap        ====>", heap)
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+
+from binary_heap import BinaryMaxHeap
+
+
+class Empty(Exception):
+    """ Raised by get when no item is available in time. """
+
+
+class Full(Exception):
+    """ Raised by put when the queue stays full. """
+
+
+class ThreadSafePriorityQueue:
+    """
+    Blocking priority queue for threads backed by a BinaryMaxHeap, like the
+    standard library Queue: put/get with timeouts, maxsize backpressure and
+    task_done/join. get_batch takes several items with one lock acquisition.
+    """
+
+    def __init__(self, maxsize=0, key=None, min_heap=False):
+        """ maxsize <= 0 means no limit. """
+        self.maxsize = maxsize
+        self._heap = BinaryMaxHeap(key=key, min_heap=min_heap)
+        self._unfinished_tasks = 0
+        self._mutex = threading.Lock()
+        # All conditions share the same lock
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._all_tasks_done = threading.Condition(self._mutex)
+
+    @staticmethod
+    def _wait(condition, predicate, block, timeout):
+        """
+        Waits (lock held) till predicate is true, returns False if it isn't
+        in time.
+        """
+        if predicate():
+            return True
+        if not block:
+            return False
+        if timeout is None:
+            condition.wait_for(predicate)
+            return True
+        if timeout < 0:
+            raise ValueError("timeout must be a non-negative number!!")
+        return condition.wait_for(predicate, timeout)
+
+    def _has_room(self):
+        return self.maxsize <= 0 or self._heap.get_size() < self.maxsize
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Adds item, waiting (up to timeout seconds) for a free slot if the
+        queue is full. Raises Full if there isn't any.
+        """
+        with self._not_full:
+            if not self._wait(self._not_full, self._has_room, block, timeout):
+                raise Full
+            self._heap.insert(item)
+            self._unfinished_tasks += 1
+            self._not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the max item, waiting (up to timeout seconds) for
+        one if the queue is empty. Raises Empty if there isn't any.
+        """
+        with self._not_empty:
+            if not self._wait(self._not_empty, self._heap.get_size, block,
+                              timeout):
+                raise Empty
+            item = self._heap.extract_max()
+            self._not_full.notify()
+            return item
+
+    def get_batch(self, n, block=True, timeout=None):
+        """
+        Removes and returns up to n items (max first) with a single lock
+        acquisition, waiting like get for the first one.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1!!")
+        with self._not_empty:
+            if not self._wait(self._not_empty, self._heap.get_size, block,
+                              timeout):
+                raise Empty
+            heap = self._heap
+            count = min(n, heap.get_size())
+            items = [heap.extract_max() for _ in range(count)]
+            self._not_full.notify(count)
+            return items
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        """ Tells that an item taken by get is processed, used by join. """
+        with self._all_tasks_done:
+            unfinished = self._unfinished_tasks - 1
+            if unfinished < 0:
+                raise ValueError("task_done() called too many times!!")
+            if not unfinished:
+                self._all_tasks_done.notify_all()
+            self._unfinished_tasks = unfinished
+
+    def join(self):
+        """ Blocks till every item put has been marked with task_done. """
+        with self._all_tasks_done:
+            self._all_tasks_done.wait_for(lambda: not self._unfinished_tasks)
+
+    def qsize(self):
+        with self._mutex:
+            return self._heap.get_size()
+
+    def empty(self):
+        return not self.qsize()
+
+    def full(self):
+        with self._mutex:
+            return not self._has_room()
+
+
+class AsyncPriorityQueue(asyncio.Queue):
+    """
+    asyncio.Queue backed by a BinaryMaxHeap, so get returns the max item.
+    Adds timeouts to put/get and get_batch. Like asyncio.Queue it is not
+    thread safe, it must be used from its event loop only.
+    """
+
+    def __init__(self, maxsize=0, key=None, min_heap=False):
+        self._key = key
+        self._min_heap = min_heap
+        super().__init__(maxsize)
+
+    # asyncio.Queue storage hooks
+    def _init(self, maxsize):
+        self._queue = BinaryMaxHeap(key=self._key, min_heap=self._min_heap)
+
+    def _put(self, item):
+        self._queue.insert(item)
+
+    def _get(self):
+        return self._queue.extract_max()
+
+    def _format(self):
+        # asyncio.Queue lists _queue for repr, a heap can't be iterated so
+        # its items are shown instead
+        heap, self._queue = self._queue, self._queue._items()
+        try:
+            return super()._format()
+        finally:
+            self._queue = heap
+
+    async def put(self, item, timeout=None):
+        """ Raises asyncio.TimeoutError if there is no room in time. """
+        if timeout is None:
+            return await super().put(item)
+        return await asyncio.wait_for(super().put(item), timeout)
+
+    async def get(self, timeout=None):
+        """ Raises asyncio.TimeoutError if there is no item in time. """
+        if timeout is None:
+            return await super().get()
+        return await asyncio.wait_for(super().get(), timeout)
+
+    async def get_batch(self, n, timeout=None):
+        """
+        Removes and returns up to n items (max first), waiting like get for
+        the first one.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1!!")
+        items = [await self.get(timeout)]
+        while len(items) < n and not self.empty():
+            items.append(self.get_nowait())
+        return items
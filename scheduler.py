@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from operator import itemgetter
+
+from binary_heap import LazyDeletionHeap
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Scheduler:
+    """
+    Delay queue keyed by due time. Timers live in a min LazyDeletionHeap so
+    schedule is O(log n), cancel is O(1) and pop_due takes every expired
+    timer in one batch. wait/wait_async sleep till the next deadline (or an
+    earlier timer being scheduled) instead of polling. Thread safe.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """ Due times are compared with clock(). """
+        self._clock = clock
+        self._timers = LazyDeletionHeap(key=itemgetter(0), min_heap=True)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # (loop, future) of coroutines sleeping in wait_async
+        self._async_waiters = []
+
+    def schedule(self, at, item):
+        """ Adds item due at clock time at, returns a handle for cancel. """
+        with self._lock:
+            timers = self._timers
+            earliest = timers.is_empty() or at < timers.get_max()[0]
+            handle = timers.insert((at, item))
+            if earliest:
+                # Sleepers computed their timeout from a later deadline
+                self._changed.notify_all()
+                for loop, waiter in self._async_waiters:
+                    loop.call_soon_threadsafe(_wake, waiter)
+        return handle
+
+    def schedule_in(self, delay, item):
+        """ Adds item due delay from now, returns a handle for cancel. """
+        return self.schedule(self._clock() + delay, item)
+
+    def cancel(self, handle):
+        """ Cancels the timer, returns False if it already fired. """
+        with self._lock:
+            return self._timers.cancel(handle)
+
+    def next_deadline(self):
+        """ Due time of the next timer, None if there is none. """
+        with self._lock:
+            top = self._timers.get_max()
+            return None if top is None else top[0]
+
+    def _pop_due(self, now):
+        timers = self._timers
+        due = []
+        while not timers.is_empty() and timers.get_max()[0] <= now:
+            due.append(timers.extract_max()[1])
+        return due
+
+    def pop_due(self, now=None):
+        """ Removes and returns the items of all timers due by now. """
+        with self._lock:
+            return self._pop_due(self._clock() if now is None else now)
+
+    def _delay(self, now, end):
+        """ Seconds to sleep: till the next deadline or end, None if never. """
+        top = self._timers.get_max()
+        wake_at = end if top is None else top[0]
+        if end is not None:
+            wake_at = min(wake_at, end)
+        return None if wake_at is None else wake_at - now
+
+    def wait(self, timeout=None):
+        """
+        Blocks till timers are due and returns their items, returns an empty
+        list if none is due within timeout seconds.
+        """
+        end = None if timeout is None else self._clock() + timeout
+        with self._lock:
+            while True:
+                now = self._clock()
+                due = self._pop_due(now)
+                if due:
+                    return due
+                delay = self._delay(now, end)
+                if delay is not None and delay <= 0:
+                    return due
+                self._changed.wait(delay)
+
+    async def wait_async(self, timeout=None):
+        """ Same as wait, sleeping in the event loop instead of a thread. """
+        loop = asyncio.get_running_loop()
+        end = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                due = self._pop_due(now)
+                if due:
+                    return due
+                delay = self._delay(now, end)
+                if delay is not None and delay <= 0:
+                    return due
+                waiter = loop.create_future()
+                entry = (loop, waiter)
+                self._async_waiters.append(entry)
+            try:
+                await asyncio.wait([waiter], timeout=delay)
+            finally:
+                with self._lock:
+                    self._async_waiters.remove(entry)
+
+    def __len__(self):
+        with self._lock:
+            return self._timers.get_size()
+
+
+if __name__ == "__main__":
+    scheduler = Scheduler()
+    scheduler.schedule_in(0.2, "retry request 2")
+    scheduler.schedule_in(0.1, "retry request 1")
+    handle = scheduler.schedule_in(0.15, "cancelled")
+    scheduler.cancel(handle)
+    print("pending     ====>", len(scheduler))
+    print("pop_due     ====>", scheduler.pop_due())
+    while len(scheduler):
+        print("wait        ====>", scheduler.wait())